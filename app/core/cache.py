@@ -0,0 +1,89 @@
+import hashlib
+from typing import Any, Awaitable, Callable
+
+import orjson
+from cachetools import TTLCache
+from fastapi import Request, Response
+
+from app.core.config import AI_CACHE_TTL_SECONDS, LLM_CACHE_TTL_SECONDS, HTTP_CACHE_MAX_AGE_SECONDS, \
+    DASHBOARD_CACHE_TTL_SECONDS, REPORT_CACHE_TTL_SECONDS, AUTH_USER_CACHE_TTL_SECONDS
+
+# Respuestas de IA por usuario. La versión del usuario forma parte de la clave,
+# así que cualquier cambio en sus transacciones invalida las entradas anteriores.
+ai_response_cache: TTLCache = TTLCache(maxsize=1024, ttl=AI_CACHE_TTL_SECONDS)
+_user_versions: dict[int, int] = {}
+
+
+def user_cache_key(user_id: int, name: str, *parts) -> tuple:
+    return name, user_id, _user_versions.get(user_id, 0), *parts
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    _user_versions[user_id] = _user_versions.get(user_id, 0) + 1
+
+
+def content_cache_key(name: str, *inputs) -> str:
+    """
+    Build a deterministic key from the inputs of a generator, so identical
+    payloads map to the same entry regardless of who requested them.
+    """
+    payload = orjson.dumps([name, *inputs], option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """TTL cache for expensive async computations, with hit/miss counters."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            cacheable: Callable[[Any], bool] = lambda value: value is not None,
+    ) -> Any:
+        value = self._cache.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await compute()
+        if cacheable(value):
+            self._cache[key] = value
+        return value
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+llm_cache = ResponseCache(maxsize=2048, ttl=LLM_CACHE_TTL_SECONDS)
+# Agregados del dashboard; las claves llevan la versión del usuario (ver user_cache_key).
+# Esa versión sólo se incrementa en el worker que atiende la escritura, así que con
+# varios workers el TTL corto es lo que acota los datos obsoletos.
+dashboard_cache = ResponseCache(maxsize=4096, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+report_cache = ResponseCache(maxsize=512, ttl=REPORT_CACHE_TTL_SECONDS)
+# Usuarios resueltos por get_current_user, por username (el "sub" del JWT).
+# user_service los descarta al actualizar o borrar el usuario, pero sólo en el worker
+# que atiende la petición; en el resto, el TTL corto acota cuánto sigue válido.
+auth_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def conditional_json_response(request: Request, content: Any) -> Response:
+    """
+    Serialize content with an ETag derived from the payload and answer 304 with
+    no body when the client's If-None-Match already holds that ETag.
+    """
+    body = orjson.dumps(content)
+    etag = f'"{hashlib.sha256(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={HTTP_CACHE_MAX_AGE_SECONDS}"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -6,8 +6,53 @@ DATABASE_URL_DEFAULT = "postgresql+asyncpg://vicente:secret@db:5432/finanzas"
 SECRET_KEY = os.getenv("SECRET_KEY", "CHANGE_ME_IN_PROD")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", 12))
 
 DATABASE_URL = os.getenv("DATABASE_URL", DATABASE_URL_DEFAULT)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 40))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Fallar rápido si el pool está agotado en lugar de encolar peticiones 30 s.
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 5))
+# Neon suspende la BD tras un rato inactiva; desactivar sólo con una BD siempre activa.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Caché de sentencias preparadas (asyncpg y dialecto de SQLAlchemy). Debe ser 0 detrás del
+# pooler de Neon/PgBouncer (modo transaction); con conexión directa a Postgres conviene
+# activarla (p. ej. 256) para no re-planificar las consultas del dashboard en cada carga.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 0))
+# Conexiones que se abren al arrancar para que las primeras peticiones no paguen el handshake (0 = ninguna).
+DB_POOL_WARMUP_SIZE = min(int(os.getenv("DB_POOL_WARMUP_SIZE", 5)), DB_POOL_SIZE)
+# Usar NullPool sólo detrás de PgBouncer en modo transaction pooling.
+DB_USE_NULLPOOL = os.getenv("DB_USE_NULLPOOL", "false").lower() == "true"
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+# Crear las tablas al arrancar. En producción sólo debe activarse en el job de migraciones.
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "false").lower() == "true"
+
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", 300))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 3600))
+# La invalidación de la caché del dashboard es por proceso: con varios workers, un
+# worker puede servir datos anteriores a una escritura hecha en otro durante este TTL.
+# Sólo conviene subirlo si se despliega con un único worker.
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 5))
+# Usuario autenticado por username. La caché es por proceso: con varios workers, un usuario
+# borrado o modificado en otro worker se sigue viendo como estaba durante este TTL.
+# require_admin relee el rol de la BD, así que una degradación de admin es inmediata.
+AUTH_USER_CACHE_TTL_SECONDS = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", 5))
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", 300))
+# Hilos para renderizar PDFs fuera del event loop.
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+# Llamadas simultáneas a Gemini permitidas por usuario.
+LLM_MAX_CONCURRENT_PER_USER = int(os.getenv("LLM_MAX_CONCURRENT_PER_USER", 2))
+# Llamadas simultáneas a Gemini en todo el proceso, para no disparar el rate limit del proveedor.
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", 32))
+# Tiempo máximo de una llamada a Gemini antes de abandonarla.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+# Espera máxima de /ai/ai-insights antes de responder "pending" y dejar la generación en segundo plano.
+AI_INSIGHTS_WAIT_SECONDS = float(os.getenv("AI_INSIGHTS_WAIT_SECONDS", 2))
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", 30))
+# Compresión gzip de respuestas: sólo a partir de este tamaño (bytes) compensa el coste de CPU.
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 1000))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", 5))
 
 def access_token_expires() -> timedelta:
     return timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
\ No newline at end of file
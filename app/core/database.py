@@ -1,30 +1,74 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+import asyncio
+import logging
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT, \
+    DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, DB_USE_NULLPOOL, SQL_ECHO
+
+logger = logging.getLogger(__name__)
 
 # Neon requiere SSL. asyncpg lo acepta via connect_args.
-# pool_pre_ping=True reconecta automáticamente si Neon suspende la BD.
+# pool_pre_ping reconecta automáticamente si Neon suspende la BD (DB_POOL_PRE_PING).
+if DB_USE_NULLPOOL:
+    pool_args = {"poolclass": NullPool}
+else:
+    pool_args = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+connect_args = {
+    "ssl": "require",
+    "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+}
+if DB_STATEMENT_CACHE_SIZE == 0:
+    # Detrás de PgBouncer una conexión del servidor se comparte entre clientes:
+    # nombres únicos evitan "prepared statement already exists".
+    connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
 engine = create_async_engine(
     DATABASE_URL,
-    echo=False,
+    echo=SQL_ECHO,
     future=True,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={
-        "ssl": "require",
-        "statement_cache_size": 0,
-    },
+    **pool_args,
+    connect_args=connect_args,
 )
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
+AsyncSessionLocal = async_sessionmaker(
+    engine,
     expire_on_commit=False,
-    class_=AsyncSession,
+    autoflush=False,
 )
 
-Base = declarative_base()
-
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def run_in_session(func, *args, **kwargs):
+    """
+    Run a service call on its own session so several can be awaited concurrently
+    (an AsyncSession does not support concurrent operations).
+    """
+    async with AsyncSessionLocal() as session:
+        return await func(session, *args, **kwargs)
+
+async def warm_up_pool(size: int) -> None:
+    """
+    Open `size` connections at once and return them to the pool, so they are
+    already established when the first requests arrive.
+    """
+    if size <= 0 or DB_USE_NULLPOOL:
+        return
+    results = await asyncio.gather(*(engine.connect() for _ in range(size)), return_exceptions=True)
+    # Devolver al pool las que sí se abrieron antes de informar de los fallos
+    connections = [r for r in results if not isinstance(r, BaseException)]
+    await asyncio.gather(*(conn.close() for conn in connections))
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        logger.warning("Could not warm up %d of %d DB connections: %s", len(errors), size, errors[0])
@@ -1,39 +1,66 @@
+import asyncio
+import functools
+import logging
+
 import bcrypt
+from cachetools import TTLCache
 from datetime import timedelta, datetime, timezone
 
 from fastapi import HTTPException
-from jose import jwt, JWTError
+import jwt
+
+from app.core.config import access_token_expires, SECRET_KEY, ALGORITHM, BCRYPT_COST
 
-from app.core.config import access_token_expires, SECRET_KEY, ALGORITHM
+logger = logging.getLogger(__name__)
 
 def hash_password(password: str) -> str:
     try:
         password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_COST)
         hashed_bytes = bcrypt.hashpw(password_bytes, salt)
         hashed_str = hashed_bytes.decode('utf-8')
         return hashed_str
     except Exception as e:
         if "password too long" in str(e):
             raise HTTPException(status_code=401, detail="Password too long")
+        logger.error("bcrypt hash failed: %s", e)
         raise
 
+@functools.lru_cache(maxsize=2048)
+def _encode_hash(hashed_password: str) -> bytes:
+    # Only stored hashes are cached, never plaintext passwords.
+    return hashed_password.encode('utf-8')
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         plain_password_bytes = plain_password.encode('utf-8')
-        hashed_password_bytes = hashed_password.encode('utf-8')
+        hashed_password_bytes = _encode_hash(hashed_password)
         return bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
     except Exception as e:
         return False
 
+async def hash_password_async(password: str) -> str:
+    # bcrypt releases the GIL, so running it in a worker thread keeps the event loop free.
+    return await asyncio.to_thread(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or access_token_expires())
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Decoded payloads keyed by raw token, so polling clients skip the HMAC + JSON work.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
 def decode_token(token: str) -> dict:
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise
\ No newline at end of file
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if payload.get("exp", 0) > datetime.now(timezone.utc).timestamp():
+            return payload
+        _token_cache.pop(token, None)
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    _token_cache[token] = payload
+    return payload
\ No newline at end of file
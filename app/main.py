@@ -1,15 +1,23 @@
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import configure_mappers
 
 from app.routes import auth, transactions, categories, budgets, users, reports, ai, metrics
 from app.core import Base
-from app.core.database import engine
+from app.core.config import RUN_MIGRATIONS, GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL, DB_POOL_WARMUP_SIZE
+from app.core.database import engine, warm_up_pool
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.category import Category
 from app.models.budget import Budget
 from contextlib import asynccontextmanager
 
+logger = logging.getLogger(__name__)
+
 origins = [
     "http://localhost:3000"
 ]
@@ -17,15 +25,23 @@ origins = [
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        # Eliminamos por si hacemos cambios en las tablas
-        #await conn.run_sync(Base.metadata.drop_all)
-        # Crear tablas si no existen
-        await conn.run_sync(Base.metadata.create_all)
+    # Configurar los mappers al arrancar en lugar de en la primera petición
+    configure_mappers()
+    if RUN_MIGRATIONS:
+        async with engine.begin() as conn:
+            # Eliminamos por si hacemos cambios en las tablas
+            #await conn.run_sync(Base.metadata.drop_all)
+            # Crear tablas si no existen
+            await conn.run_sync(Base.metadata.create_all)
+    try:
+        await warm_up_pool(DB_POOL_WARMUP_SIZE)
+    except Exception as e:
+        # No impedir el arranque: el pool abrirá las conexiones bajo demanda
+        logger.warning("Could not warm up the DB pool: %s", e)
     yield
 
 
-app = FastAPI(title="FinTrack API", version="0.1.0", lifespan=lifespan)
+app = FastAPI(title="FinTrack API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +49,18 @@ app.add_middleware(
     allow_credentials=True,  # Permitir cookies/autenticación
     allow_methods=["*"],  # Permitir todos los métodos (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Permitir todos los headers
+    expose_headers=["X-Total-Count"],  # Total del listado paginado de usuarios
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    # Los HTTPException siguen pasando por el handler propio de FastAPI
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
+    return ORJSONResponse(
+        status_code=500,
+        content={"success": False, "error": "Internal server error"},
+    )
 
 # Rutas
 app.include_router(auth.router)
@@ -11,7 +11,7 @@ class Category(Base):
     name = Column(String, nullable=False)
 
     # FK
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="categories")
@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import Column, Integer, ForeignKey, Float, String, Date
+from sqlalchemy import Column, Integer, ForeignKey, Float, String, Date, Index
 from sqlalchemy.orm import relationship
 
 from app.core import Base
@@ -8,11 +8,14 @@ from app.core import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_id_transaction_date", "user_id", "transaction_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Float, nullable=False)
     description = Column(String, nullable=False)
-    transaction_date = Column(Date, default=date.today(), nullable=False)
+    transaction_date = Column(Date, default=date.today, nullable=False)
     created_at = Column(Date, default=date.today, nullable=False)
     updated_at = Column(Date, default=date.today, onupdate=date.today, nullable=False)
     type = Column(String, nullable=False)
@@ -24,4 +27,4 @@ class Transaction(Base):
 
     # relationships
     user = relationship("User", back_populates="transactions")
-    category = relationship("Category", back_populates="transactions")
\ No newline at end of file
+    category = relationship("Category", back_populates="transactions", lazy="raise")
\ No newline at end of file
@@ -1,156 +1,160 @@
-from typing import Dict
+import asyncio
+from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Query, Request
 from fastapi.params import Depends
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, func, literal
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from starlette import status
 
-from app.core.database import get_db
+from app.core.cache import ai_response_cache, user_cache_key, invalidate_user_cache, llm_cache, content_cache_key, \
+    conditional_json_response
+from app.core.config import AI_INSIGHTS_WAIT_SECONDS
+from app.core.database import AsyncSessionLocal, run_in_session
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.services.ai_service import predict_future_transactions, get_ai_insights_data, generate_financial_insights, \
+from app.services.ai_service import predict_future_transactions, user_llm_slot, \
     analyze_spending_trends, generate_balance_forecast, generate_spending_predictions, generate_risk_analysis, \
     generate_smart_recommendations
 from app.services.auth_service import get_current_user
+from app.services.insights_cache import cached_ai_insights_data, get_cached_ai_insights, schedule_insights_warmup
 from app.services.metrics_service import get_budget_overview, calculate_financial_summary
 
 router = APIRouter(prefix="/ai", tags=["AI Predictions"])
 
+# The prompt cannot usefully consume more history than this.
+PREDICTION_TRANSACTION_LIMIT = 500
+
+SpendingTimeframe = Literal["1month", "3months", "6months"]
+ForecastTimeframe = Literal["3months", "6months", "1year"]
+
 
 @router.get("/predict")
-async def predict_transaction(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def predict_transaction(current_user: User = Depends(get_current_user)):
     """
     Predict future transaction for the logged-in user using Gemini AI.
     """
-    result = await db.execute(select(Transaction).where(Transaction.user_id == current_user.id))
-    transactions = result.scalars().all()
-
-    if not transactions:
-        return {
+    cache_key = user_cache_key(current_user.id, "ai:predict")
+    cached = ai_response_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
+    recent = (
+        select(
+            Transaction.id,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.transaction_date,
+            Transaction.category_id,
+        )
+        .where(Transaction.user_id == current_user.id)
+        .order_by(Transaction.transaction_date.desc())
+        .limit(PREDICTION_TRANSACTION_LIMIT)
+        .subquery()
+    )
+    # PostgreSQL builds the prompt payload as one JSON array instead of one Python dict per row.
+    transactions_json = func.json_agg(
+        aggregate_order_by(
+            func.json_build_object(
+                "id", recent.c.id,
+                "amount", recent.c.amount,
+                "description", recent.c.description,
+                "date", func.to_char(recent.c.transaction_date, "YYYY-MM-DD"),
+                "category_id", recent.c.category_id,
+            ),
+            recent.c.transaction_date.desc(),
+        ),
+        type_=JSON,
+    )
+    # La conexión se libera antes de la llamada a Gemini
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(func.coalesce(transactions_json, literal([], JSON))))
+        transactions_list = result.scalar_one()
+
+    if not transactions_list:
+        return ORJSONResponse({
             "user_id": current_user.id,
             "message": "No transactions found for prediction",
             "predictions": []
-        }
-
-    transactions_list = [
-        {
-            "id": t.id,
-            "amount": float(t.amount),
-            "description": t.description,
-            "date": t.transaction_date.isoformat(),
-            "category_id": t.category_id
-        }
-        for t in transactions
-    ]
+        })
 
-    ai_response = await predict_future_transactions(transactions_list)
+    async with user_llm_slot(current_user.id):
+        ai_response = await predict_future_transactions(transactions_list)
 
     if "error" in ai_response:
-        return {
+        return ORJSONResponse({
             "user_id": current_user.id,
             "error": True,
             "details": ai_response
-        }
+        })
 
-    return {
+    response = {
         "user_id": current_user.id,
         "prediction": ai_response,
         "total_predictions": len(ai_response.get("predictions", []))
     }
+    ai_response_cache[cache_key] = response
+    return ORJSONResponse(response)
 
 
 @router.get("/ai-insights",
             summary="Get AI-powered financial insights",
-            description="Returns AI-generated insights and predictions based on user's transaction history and spending patterns.",
-            response_model=Dict)
+            description="Returns AI-generated insights and predictions based on user's transaction history and spending patterns.")
 async def get_ai_insights_endpoint(
-        db: AsyncSession = Depends(get_db),
+        request: Request,
         current_user: User = Depends(get_current_user)
 ):
     """
     Obtain AI-insights data based in transaction patterns.
     """
+    cached = get_cached_ai_insights(current_user.id)
+    if cached is not None:
+        return conditional_json_response(request, cached)
+
     try:
-        insights_data = await get_ai_insights_data(db, current_user.id)
-        if not insights_data["transactions"]:
-            return {
-                "success": True,
-                "data": {
-                    "insights": [
-                        {
-                            "type": "tip",
-                            "title": "Empieza a registrar transacciones",
-                            "message": "Registra tus gastos e ingresos para obtener análisis personalizados con IA",
-                            "confidence": "Alta",
-                            "icon": "lightbulb",
-                            "color": "secondary"
-                        }
-                    ],
-                    "message": "No hay suficientes transacciones para generar insights"
-                },
-                "user_id": current_user.id,
-                "transactions_analyzed": 0
-            }
-        budget_data = await get_budget_overview(db, current_user.id)
-        financial_summary = await calculate_financial_summary(db, current_user.id)
-
-        ai_response = await generate_financial_insights(
-            transactions=insights_data["transactions"],
-            budgets=budget_data,
-            financial_summary=financial_summary
-        )
-        if "error" in ai_response:
-            return {
-                "success": False,
-                "error": "AI service unavailable",
-                "data": {
-                    "insights": [],
-                    "message": "Los insights de IA no están disponibles temporalmente."
-                },
-                "user_id": current_user.id,
-            }
-        return {
+        # La generación sigue en segundo plano aunque se agote la espera
+        task = schedule_insights_warmup(current_user.id)
+        response = await asyncio.wait_for(asyncio.shield(task), timeout=AI_INSIGHTS_WAIT_SECONDS)
+        return conditional_json_response(request, response)
+
+    except asyncio.TimeoutError:
+        return ORJSONResponse(status_code=status.HTTP_202_ACCEPTED, content={
             "success": True,
-            "data": ai_response,
-            "transactions_analyzed": len(insights_data["transactions"])
-        }
+            "status": "pending",
+            "data": {
+                "insights": [],
+                "message": "Estamos generando tus insights. Vuelve a consultar en unos segundos."
+            },
+            "user_id": current_user.id
+        })
 
-    except Exception as e:
-        return {
+    except Exception:
+        # El fallo ya lo registra el callback de la tarea; no se expone su texto al cliente
+        return ORJSONResponse({
             "success": False,
-            "error": str(e),
+            "error": "AI service unavailable",
             "data": {
-                "insights": [
-                    {
-                        "type": "warning",
-                        "title": "Error generando insights",
-                        "message": "Hubo un problema al generar los insights. Por favor, intenta más tarde.",
-                        "confidence": "Alta",
-                        "icon": "alert-triangle",
-                        "color": "destructive"
-                    }
-                ]
+                "insights": [],
+                "message": "Los insights de IA no están disponibles temporalmente."
             },
             "user_id": current_user.id
-        }
+        })
 
 @router.get("/spending-trends",
             summary="Analyze spending trends",
-            description="Analyze user's spending trends over time to identify patterns and changes in financial behavior.",
-            response_model=Dict)
+            description="Analyze user's spending trends over time to identify patterns and changes in financial behavior.")
 async def get_spending_trends(
-        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Analyzes user's spending trends.
     """
     try:
-        insights_data = await get_ai_insights_data(db, current_user.id)
+        insights_data = await run_in_session(cached_ai_insights_data, current_user.id)
 
         if not insights_data["transactions"]:
-            return {
+            return ORJSONResponse({
                 "success": True,
                 "data": {
                     "trend":"neutral",
@@ -158,19 +162,19 @@ async def get_spending_trends(
                     "percentage":0
                 },
                 "user_id": current_user.id,
-            }
+            })
 
         trend_analysis = await analyze_spending_trends(insights_data["transactions"])
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "data": trend_analysis,
             "user_id": current_user.id,
             "transactions_analyzed": len(insights_data["transactions"])
-        }
+        })
 
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "success": False,
             "error": str(e),
             "data": {
@@ -179,127 +183,135 @@ async def get_spending_trends(
                 "percentage":0
             },
             "user_id": current_user.id
-        }
+        })
 
 
 @router.get("/predictions/spending",
             summary="Get spending predictions",
             description="Predict future spending patterns by category")
 async def get_spending_predictions(
-        timeframe: str = Query("1month", regex="^(1month|3months|6months)$"),
-        db: AsyncSession = Depends(get_db),
+        timeframe: SpendingTimeframe = Query("1month"),
         current_user: User = Depends(get_current_user)
 ):
     """
     Get AI predictions for future spending by category
     """
     try:
-        insights_data = await get_ai_insights_data(db, current_user.id)
+        insights_data = await run_in_session(cached_ai_insights_data, current_user.id)
 
         if not insights_data["transactions"]:
-            return {
+            return ORJSONResponse({
                 "success": True,
                 "predictions": [],
                 "message": "No hay suficientes datos para predicciones"
-            }
-
-        predictions = await generate_spending_predictions(
-            insights_data["transactions"],
-            timeframe
+            })
+
+        predictions = await llm_cache.get_or_compute(
+            content_cache_key("spending_predictions", insights_data["transactions"], timeframe),
+            lambda: generate_spending_predictions(
+                insights_data["transactions"],
+                timeframe
+            )
         )
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "predictions": predictions,
             "timeframe": timeframe
-        }
+        })
 
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "success": False,
             "error": str(e),
             "predictions": []
-        }
+        })
 
 
 @router.get("/forecast/balance",
             summary="Get balance forecast",
             description="Forecast future balance with optimistic, realistic, and conservative scenarios")
 async def get_balance_forecast(
-        timeframe: str = Query("6months", regex="^(3months|6months|1year)$"),
-        db: AsyncSession = Depends(get_db),
+        timeframe: ForecastTimeframe = Query("6months"),
         current_user: User = Depends(get_current_user)
 ):
     """
     Get balance forecast for different scenarios
     """
     try:
-        insights_data = await get_ai_insights_data(db, current_user.id)
+        insights_data = await run_in_session(cached_ai_insights_data, current_user.id)
 
         if not insights_data["transactions"]:
-            return {
+            return ORJSONResponse({
                 "success": False,
                 "forecast": None,
                 "message": "No hay suficientes datos para pronóstico"
-            }
-
-        forecast = await generate_balance_forecast(
-            insights_data["transactions"],
-            timeframe
+            })
+
+        forecast = await llm_cache.get_or_compute(
+            content_cache_key("balance_forecast", insights_data["transactions"], timeframe),
+            lambda: generate_balance_forecast(
+                insights_data["transactions"],
+                timeframe
+            )
         )
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "forecast": forecast
-        }
+        })
 
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "success": False,
             "error": str(e),
             "forecast": None
-        }
+        })
 
 
 @router.get("/recommendations",
             summary="Get smart recommendations",
             description="Get AI-powered personalized financial recommendations")
 async def get_recommendations(
-        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Get personalized smart recommendations
     """
     try:
-        insights_data = await get_ai_insights_data(db, current_user.id)
-        budget_data = await get_budget_overview(db, current_user.id)
-        financial_summary = await calculate_financial_summary(db, current_user.id)
+        insights_data, budget_data, financial_summary = await asyncio.gather(
+            run_in_session(cached_ai_insights_data, current_user.id),
+            run_in_session(get_budget_overview, current_user.id),
+            run_in_session(calculate_financial_summary, current_user.id),
+        )
 
         if not insights_data["transactions"]:
-            return {
+            return ORJSONResponse({
                 "success": True,
                 "recommendations": [],
                 "message": "No hay suficientes datos para recomendaciones"
-            }
-
-        recommendations = await generate_smart_recommendations(
-            insights_data["transactions"],
-            budget_data,
-            financial_summary
+            })
+
+        recommendations = await llm_cache.get_or_compute(
+            content_cache_key("smart_recommendations", insights_data["transactions"], budget_data, financial_summary),
+            lambda: generate_smart_recommendations(
+                insights_data["transactions"],
+                budget_data,
+                financial_summary
+            )
         )
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "recommendations": recommendations
-        }
+        })
 
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "success": False,
             "error": str(e),
             "recommendations": []
-        }
+        })
 
 
 @router.post("/recommendations/{recommendation_id}/apply",
@@ -315,18 +327,17 @@ async def apply_recommendation(
     # TODO: Implement logic to track applied recommendations
     # This could involve creating budgets, setting goals, etc.
 
-    return {
+    return ORJSONResponse({
         "success": True,
         "message": f"Recomendación {recommendation_id} aplicada correctamente",
         "recommendation_id": recommendation_id
-    }
+    })
 
 
 @router.get("/savings-goals/predictions",
             summary="Get savings goal predictions",
             description="Predict likelihood of achieving savings goals")
 async def get_savings_goal_predictions(
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -334,59 +345,62 @@ async def get_savings_goal_predictions(
     """
     # TODO: Implement when savings goals model is ready
 
-    return {
+    return ORJSONResponse({
         "success": True,
         "predictions": [],
         "message": "Funcionalidad de metas de ahorro en desarrollo"
-    }
+    })
 
 
 @router.get("/risk-analysis",
             summary="Get financial risk analysis",
             description="Analyze financial health and risk factors")
 async def get_risk_analysis(
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get comprehensive risk analysis
     """
     try:
-        insights_data = await get_ai_insights_data(db, current_user.id)
-        budget_data = await get_budget_overview(db, current_user.id)
-        financial_summary = await calculate_financial_summary(db, current_user.id)
+        insights_data, budget_data, financial_summary = await asyncio.gather(
+            run_in_session(cached_ai_insights_data, current_user.id),
+            run_in_session(get_budget_overview, current_user.id),
+            run_in_session(calculate_financial_summary, current_user.id),
+        )
 
         if not insights_data["transactions"]:
-            return {
+            return ORJSONResponse({
                 "success": False,
                 "analysis": None,
                 "message": "No hay suficientes datos para análisis de riesgo"
-            }
-
-        analysis = await generate_risk_analysis(
-            insights_data["transactions"],
-            budget_data,
-            financial_summary
+            })
+
+        analysis = await llm_cache.get_or_compute(
+            content_cache_key("risk_analysis", insights_data["transactions"], budget_data, financial_summary),
+            lambda: generate_risk_analysis(
+                insights_data["transactions"],
+                budget_data,
+                financial_summary
+            )
         )
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "analysis": analysis
-        }
+        })
 
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "success": False,
             "error": str(e),
             "analysis": None
-        }
+        })
 
 
 @router.post("/refresh",
              summary="Refresh AI analysis",
              description="Force refresh of all AI-generated insights and predictions")
 async def refresh_ai_analysis(
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -394,23 +408,37 @@ async def refresh_ai_analysis(
     """
     try:
         # Re-fetch all data to ensure fresh analysis
-        insights_data = await get_ai_insights_data(db, current_user.id)
+        invalidate_user_cache(current_user.id)
+        insights_data = await run_in_session(cached_ai_insights_data, current_user.id)
 
         if not insights_data["transactions"]:
-            return {
+            return ORJSONResponse({
                 "success": False,
                 "message": "No hay transacciones para analizar"
-            }
+            })
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": "Análisis actualizado correctamente",
             "timestamp": insights_data["transactions"][0]["date"] if insights_data["transactions"] else None
-        }
+        })
 
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "success": False,
             "error": str(e),
             "message": "Error al actualizar análisis"
-        }
\ No newline at end of file
+        })
+
+
+@router.get("/cache-stats",
+            summary="Get AI cache statistics",
+            description="Returns hit and miss counters for the AI response cache.")
+async def get_ai_cache_stats(current_user: User = Depends(get_current_user)):
+    """
+    Expose AI response cache counters
+    """
+    return ORJSONResponse({
+        "success": True,
+        "stats": llm_cache.stats()
+    })
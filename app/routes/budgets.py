@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict
+from pydantic import TypeAdapter
 
+from app.core.cache import invalidate_user_cache, conditional_json_response
 from app.core.database import get_db
 from app.models.user import User
 from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse
@@ -18,6 +21,8 @@ from app.services.budget_service import (
 
 router = APIRouter(prefix="/budgets", tags=["Budgets"])
 
+_budget_list_adapter = TypeAdapter(List[BudgetResponse])
+
 # ============= GET ROUTES Endpoints =============
 
 @router.get("/",
@@ -25,10 +30,12 @@ router = APIRouter(prefix="/budgets", tags=["Budgets"])
             description="Returns a list of all budgets belonging to the current user including their details such as name, amount, dates, and category.",
             response_model=List[BudgetResponse])
 async def list_budgets(
+        request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
 ):
-    return await get_budgets(db, current_user.id)
+    budgets = _budget_list_adapter.validate_python(await get_budgets(db, current_user.id))
+    return conditional_json_response(request, _budget_list_adapter.dump_python(budgets, mode="json"))
 
 @router.get("/alerts",
             summary="Get budget alerts",
@@ -38,18 +45,19 @@ async def list_budget_alerts(
         current_user: User = Depends(get_current_user),
 ):
     alerts = await get_budget_alerts(db, current_user.id)
-    return {"alerts": alerts}
+    return ORJSONResponse({"alerts": alerts})
 
 
 @router.get("/overview",
             summary="Get budget overview",
             description="Returns overall budget metrics including total budget, spent amount, and exceeded budgets.")
 async def get_overview(
+        request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
 ):
     overview = await get_budget_overview(db, current_user.id)
-    return {"overview": overview}
+    return conditional_json_response(request, {"overview": overview})
 
 
 @router.get("/analytics",
@@ -61,7 +69,7 @@ async def get_analytics(
         current_user: User = Depends(get_current_user),
 ):
     analytics = await get_budget_analytics(db, current_user.id, period)
-    return {"analytics": analytics}
+    return ORJSONResponse({"analytics": analytics})
 
 
 @router.get("/category-breakdown",
@@ -72,7 +80,7 @@ async def get_breakdown(
         current_user: User = Depends(get_current_user),
 ):
     breakdown = await get_category_spending_breakdown(db, current_user.id)
-    return {"breakdown": breakdown}
+    return ORJSONResponse({"breakdown": breakdown})
 
 
 @router.get("/performance/metrics",
@@ -83,7 +91,7 @@ async def get_performance(
         current_user: User = Depends(get_current_user),
 ):
     performance = await get_budget_performance(db, current_user.id)
-    return {"performance": performance}
+    return ORJSONResponse({"performance": performance})
 
 @router.get("/{budget_id}",
             summary="Retrieve a specific budget by its ID.",
@@ -111,7 +119,9 @@ async def create_new_budget(
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
 ):
-    return await create_budget(db, current_user.id, budget)
+    new_budget = await create_budget(db, current_user.id, budget)
+    invalidate_user_cache(current_user.id)
+    return new_budget
 
 
 @router.put("/{budget_id}",
@@ -130,6 +140,7 @@ async def update_user_budget(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Budget not found"
         )
+    invalidate_user_cache(current_user.id)
     return updated_budget
 
 
@@ -143,4 +154,11 @@ async def delete_user_budget(
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
 ):
-    return await delete_budget(db, current_user.id, id)
\ No newline at end of file
+    deleted_id = await delete_budget(db, current_user.id, id)
+    if deleted_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Budget not found"
+        )
+    invalidate_user_cache(current_user.id)
+    return {"success": True, "message": "Budget deleted"}
\ No newline at end of file
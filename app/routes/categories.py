@@ -1,8 +1,9 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import invalidate_user_cache, conditional_json_response
 from app.core.database import get_db
 from app.models.user import User
 from app.schemas.category import CategoryResponse, CategoryCreate, CategoryUpdate
@@ -13,7 +14,6 @@ from app.services.categories_service import get_categories, create_category, get
 router = APIRouter(
     prefix="/categories",
     tags=["categories"],
-    dependencies=[Depends(get_current_user)]
 )
 
 
@@ -23,8 +23,13 @@ router = APIRouter(
             summary="List categories",
             description="Return all authenticated user categories."
             )
-async def list_categories(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await get_categories(db, current_user.id)
+async def list_categories(
+        request: Request,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    # get_categories ya construye los dicts con la forma de CategoryResponse; response_model queda para OpenAPI
+    return conditional_json_response(request, await get_categories(db, current_user.id))
 
 
 @router.get("/{id}",
@@ -34,7 +39,7 @@ async def list_categories(db: AsyncSession = Depends(get_db), current_user: User
             description="Return a specific category by ID."
             )
 async def list_category_by_id(
-        id: int,
+        id: int = Path(..., ge=1, description="Category ID"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
@@ -60,14 +65,15 @@ async def create_new_category(
             summary="Update a category",
             description="Allows user to update a category.")
 async def update_user_category(
-        id: int,
         category: CategoryUpdate,
+        id: int = Path(..., ge=1, description="Category ID"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     updated_category = await update_category(db, current_user.id, id, category)
     if not updated_category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    invalidate_user_cache(current_user.id)
     return updated_category
 
 
@@ -75,8 +81,10 @@ async def update_user_category(
                summary="Delete a category",
                description="Allows user to delete a category and all of the associated transactions.")
 async def delete_user_category(
-        id: int,
+        id: int = Path(..., ge=1, description="Category ID"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    return await delete_category(db, current_user.id, id)
+    result = await delete_category(db, current_user.id, id)
+    invalidate_user_cache(current_user.id)
+    return result
@@ -1,77 +1,75 @@
+import asyncio
 from typing import Dict, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Request
 from fastapi.params import Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette import status
 
-from app.core.database import get_db
+from app.core.cache import dashboard_cache, user_cache_key, conditional_json_response
+from app.core.database import get_db, run_in_session
 from app.models.user import User
 from app.services.auth_service import get_current_user
 from app.services.metrics_service import calculate_financial_summary, get_monthly_chart_data, get_category_chart_data, \
-    get_recent_transactions, get_budget_overview
+    get_recent_transactions, get_budget_overview, get_budget_status_stats
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
+async def _cached_metric(user_id: int, func, *args, db: Optional[AsyncSession] = None):
+    """
+    Return func(db, user_id, *args) from the dashboard cache. Without db, a miss
+    runs on its own session so several metrics can be gathered concurrently.
+    """
+    key = user_cache_key(user_id, f"dash:{func.__name__}", *args)
+    if db is None:
+        return await dashboard_cache.get_or_compute(key, lambda: run_in_session(func, user_id, *args))
+    return await dashboard_cache.get_or_compute(key, lambda: func(db, user_id, *args))
+
+
 @router.get("/financial-summary",
             description="Returns main financial metrics for dashboard cards: balance, income, expenses, savings with month-over-month comparisons.",
             response_model=Dict)
 async def get_financial_summary(
+        request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Obtains financial metrics for dashboard cards.
     """
-    try:
-        summary = await calculate_financial_summary(db, current_user.id)
-        return {
-            "success": True,
-            "data": summary
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error calculating financial metrics: {str(e)}"
-        )
+    summary = await _cached_metric(current_user.id, calculate_financial_summary, db=db)
+    return conditional_json_response(request, {
+        "success": True,
+        "data": summary
+    })
 
 @router.get("/monthly-data",
             summary="Get monthly chart data",
             description="Returns income, expenses and balance data for the last 6 months for area/line charts.",
             response_model=Dict)
 async def get_monthly_data(
-        months: int = 6,
+        request: Request,
+        months: int = Query(6, ge=1, le=24, description="Number of months (1-24)"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Obtains data for the monthly chart
     """
-    try:
-        if months < 1 or months > 24:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Months parameter must be between 1 and 24"
-            )
-        monthly_data = await get_monthly_chart_data(db, current_user.id, months)
-        return {
-            "success": True,
-            "data": monthly_data,
-            "period_month": months
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting monthly data: {str(e)}"
-        )
+    monthly_data = await _cached_metric(current_user.id, get_monthly_chart_data, months, db=db)
+    return conditional_json_response(request, {
+        "success": True,
+        "data": monthly_data,
+        "period_month": months
+    })
 
 @router.get("/category-data",
             summary="Get monthly expenses data",
             description="Returns expenses grouped by category for bar charts and category analysis.",
             response_model=Dict)
 async def get_category_data(
-        month: Optional[int] = Query(None, description="Month (1-12). If not provided, uses current month"),
+        request: Request,
+        month: Optional[int] = Query(None, ge=1, le=12, description="Month (1-12). If not provided, uses current month"),
         year: Optional[int] = Query(None, description="Year. If not provided, uses current year"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
@@ -79,118 +77,85 @@ async def get_category_data(
     """
     Obtain expenses data per category for bar graphic chart.
     """
-    try:
-        category_data = await get_category_chart_data(db, current_user.id, month, year)
-        return {
-            "success": True,
-            "data": category_data,
-            "total_categories": len(category_data)
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting category data: {str(e)}"
-        )
+    category_data = await _cached_metric(current_user.id, get_category_chart_data, month, year, db=db)
+    return conditional_json_response(request, {
+        "success": True,
+        "data": category_data,
+        "total_categories": len(category_data)
+    })
 
 @router.get("/recent-transactions",
             summary="Get recent transactions",
             description="Returns the most recent transactions with category information for the dashboard transactions list.",
             response_model=Dict)
 async def get_recent_transactions_endpoint(
-        limit: int = 10,
+        request: Request,
+        limit: int = Query(10, ge=1, le=50, description="Number of transactions (1-50)"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Obtains most recent transactions for show them in the main dashboard.
     """
-    try:
-        if limit < 1 or limit > 50:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Limit parameter must be between 1 and 50"
-            )
-        recent_data = await get_recent_transactions(db, current_user.id, limit)
-        return {
-            "success": True,
-            "data": recent_data,
-            "count": len(recent_data)
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting recent transactions: {str(e)}"
-        )
+    recent_data = await get_recent_transactions(db, current_user.id, limit)
+    return conditional_json_response(request, {
+        "success": True,
+        "data": recent_data,
+        "count": len(recent_data)
+    })
 
 @router.get("/budget-overview",
             summary="Get budget overview",
             description="Returns current month budget status with spent amounts, percentages, and alerts for budget management.",
             response_model=Dict)
 async def get_budget_overview_endpoint(
+        request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Obtain budget summary for the current month.
     """
-    try:
-        budget_data = await get_budget_overview(db, current_user.id)
-
-        total_budgets = len(budget_data)
-        over_budget = sum(1 for b in budget_data if b["status"] == "over")
-        warning_budget = sum(1 for b in budget_data if b["status"] == "warning")
-
-        return {
-            "success": True,
-            "data": budget_data,
-            "stats": {
-                "total_budgets": total_budgets,
-                "over_budget_count": over_budget,
-                "warning_budget_count": warning_budget,
-                "good_budget_count": total_budgets - over_budget - warning_budget,
-            }
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting budget overview: {str(e)}"
-        )
+    budget_data = await _cached_metric(current_user.id, get_budget_overview, db=db)
+
+    return conditional_json_response(request, {
+        "success": True,
+        "data": budget_data,
+        "stats": get_budget_status_stats(budget_data)
+    })
 
 @router.get("/complete",
             summary="Get complete dashboard data",
             description="Returns all dashboard data in a single request for initial page load optimization.",
             response_model=Dict)
 async def get_complete_dashboard(
-        db: AsyncSession = Depends(get_db),
+        request: Request,
         current_user: User = Depends(get_current_user)
 ):
     """
     Optimized endpoint that returns all dashboard data in a single request.
     """
-    try:
-        financial_summary = await calculate_financial_summary(db, current_user.id)
-        monthly_data = await get_monthly_chart_data(db, current_user.id, 6)
-        category_data = await get_category_chart_data(db, current_user.id)
-        recent_data = await get_recent_transactions(db, current_user.id, 10)
-        budget_data = await get_budget_overview(db, current_user.id)
-
-        return {
-            "success": True,
-            "data": {
-                "financial_summary": financial_summary,
-                "monthly_chart": monthly_data,
-                "category_chart": category_data,
-                "recent_transactions": recent_data,
-                "budget_overview": budget_data
-            },
-            "user_id": current_user.id,
-            "timestamp": "now"
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting complete dashboard data: {str(e)}"
-        )
+    # Consultas independientes y de solo lectura: cada una con su propia sesión
+    financial_summary, monthly_data, category_data, recent_data, budget_data = await asyncio.gather(
+        _cached_metric(current_user.id, calculate_financial_summary),
+        _cached_metric(current_user.id, get_monthly_chart_data, 6),
+        _cached_metric(current_user.id, get_category_chart_data, None, None),
+        run_in_session(get_recent_transactions, current_user.id, 10),
+        _cached_metric(current_user.id, get_budget_overview),
+    )
+
+    return conditional_json_response(request, {
+        "success": True,
+        "data": {
+            "financial_summary": financial_summary,
+            "monthly_chart": monthly_data,
+            "category_chart": category_data,
+            "recent_transactions": recent_data,
+            "budget_overview": budget_data
+        },
+        "user_id": current_user.id,
+        "timestamp": "now"
+    })
 
 @router.get("/health",
             summary="Dashboard health check",
@@ -1,24 +1,55 @@
-from typing import Dict
+from typing import Dict, Literal, Optional, Tuple
 
-from app.services.budget_metrics_service import get_category_spending_breakdown
-from app.services.metrics_service import get_monthly_chart_data
 from datetime import timedelta, date
 
-from fastapi import APIRouter, Query, Depends, HTTPException, Body
+import orjson
+
+from fastapi import APIRouter, Query, Depends, HTTPException, Body, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.responses import StreamingResponse, JSONResponse
+from fastapi.responses import ORJSONResponse
+from starlette.responses import StreamingResponse
 
-from app.core.database import get_db
+from app.core.cache import conditional_json_response
+from app.core.database import get_db, AsyncSessionLocal
 from app.models.user import User
 from app.schemas.report_schema import ReportResponse
 from app.services.auth_service import get_current_user
-from app.services.report_service import generate_report, generate_pdf_report, export_report_by_filters, \
+from app.services.report_service import get_or_build_report, get_or_build_report_json, generate_pdf_report, \
+    iter_report_transactions, \
+    export_report_by_filters, \
     get_trend_analysis_by_period, get_income_analysis_by_period, get_expense_analysis_by_period, \
     get_financial_summary_by_period
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
+async def get_today() -> date:
+    """Request-scoped 'today', so every range in a request uses the same date."""
+    return date.today()
+
+
+ReportPeriod = Literal["custom", "weekly", "monthly"]
+ExportFormat = Literal[
+    "pdf", "json", "ndjson",
+    # Rutas antiguas /generate/<period>_<fmt>, se mantienen para los clientes existentes
+    "custom_pdf", "weekly_pdf", "monthly_pdf",
+    "custom_json", "weekly_json", "monthly_json",
+]
+
+_PERIOD_DAYS = {"weekly": 7, "monthly": 30}
+
+
+def _report_range(period: str, start_date: Optional[date], end_date: Optional[date],
+                  today: date) -> Tuple[Optional[date], Optional[date]]:
+    """Resolve the date range of a report period; explicit dates take precedence."""
+    if period != "custom":
+        end_date = end_date or today
+        start_date = start_date or end_date - timedelta(days=_PERIOD_DAYS[period])
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    return start_date, end_date
+
+
 @router.get("/custom", summary="Generate Custom Report",
             description="Generate a financial report for a custom date range", response_model=ReportResponse)
 async def get_custom_report(
@@ -30,13 +61,13 @@ async def get_custom_report(
     if start_date and end_date and start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date must be before end date")
 
-    report = await generate_report(
+    report = await get_or_build_report_json(
         db=db,
         user_id=current_user.id,
         start_date=start_date,
         end_date=end_date,
     )
-    return report
+    return ORJSONResponse(report)
 
 
 @router.get("/summary",
@@ -138,7 +169,7 @@ async def export_report_endpoint(
             )
         elif format_type == 'json':
             # Si es en JSON, devolver directamente datos
-            return JSONResponse(
+            return ORJSONResponse(
                 content=report_data,
                 headers={"Content-Disposition": f"attachment; filename={filename}"}
             )
@@ -158,234 +189,104 @@ async def export_report_endpoint(
 @router.get("/weekly", summary="Generate Weekly Report",
             description="Generate a financial report for the last 7 days", response_model=ReportResponse)
 async def get_weekly_report(
+        request: Request,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user),
+        today: date = Depends(get_today)
 ):
-    end_date = date.today()
-    start_date = end_date - timedelta(days=7)
+    start_date, end_date = _report_range("weekly", None, None, today)
 
-    weekly_report = await generate_report(
+    weekly_report = await get_or_build_report_json(
         db=db,
         user_id=current_user.id,
         start_date=start_date,
         end_date=end_date,
     )
-    return weekly_report
+    return conditional_json_response(request, weekly_report)
 
 
 @router.get("/monthly", summary="Generate Monthly Report",
             description="Generate a financial report for the last 30 days", response_model=ReportResponse)
 async def get_monthly_report(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
-    end_date = date.today()
-    start_date = end_date - timedelta(days=30)
-
-    monthly_report = await generate_report(
-        db=db,
-        user_id=current_user.id,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    return monthly_report
-
-
-@router.get("/generate/pdf",
-            summary="Export Report as PDF",
-            description="Generate and download a complete financial report as PDF"
-            )
-async def export_report_pdf(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
-    report_data = await generate_report(db, current_user.id)
-    pdf_file = await generate_pdf_report(report_data)
-    return StreamingResponse(
-        pdf_file,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": "attachment; filename=financial_report.pdf"
-        }
-    )
-
-
-@router.get("/generate/custom_pdf",
-            summary="Export PDF report with custom date ranges",
-            description="Generate and download a complete financial report as PDF")
-async def export_custom_pdf_report(
+        request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
-        start_date: date = Query(None, description="Start date"),
-        end_date: date = Query(None, description="End date")
+        today: date = Depends(get_today)
 ):
-    if start_date and end_date and start_date > end_date:
-        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    start_date, end_date = _report_range("monthly", None, None, today)
 
-    report_data = await generate_report(
+    monthly_report = await get_or_build_report_json(
         db=db,
         user_id=current_user.id,
         start_date=start_date,
         end_date=end_date,
     )
-    pdf_file = await generate_pdf_report(report_data)
-    return StreamingResponse(
-        pdf_file,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": "attachment; filename=financial_weekly_report.pdf"
-        }
-    )
-
-
-@router.get("/generate/weekly_pdf",
-            summary="Export Weekly PDF report with last 7 days",
-            description="Generate and download a complete financial report in PDF format for the last 7 days")
-async def export_weekly_pdf(
+    return conditional_json_response(request, monthly_report)
+
+
+@router.get("/generate/{fmt}",
+            summary="Export Report",
+            description="Generate and download a financial report as PDF or JSON, or its transactions as NDJSON, "
+                        "for a custom range or the last 7 (weekly) / 30 (monthly) days")
+async def export_report(
+        fmt: ExportFormat,
+        period: Optional[ReportPeriod] = Query(None, description="Period: custom (default), weekly, monthly"),
+        start_date: Optional[date] = Query(None, description="Start date"),
+        end_date: Optional[date] = Query(None, description="End date"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
+        today: date = Depends(get_today)
 ):
-    end_date = date.today()
-    start_date = end_date - timedelta(days=7)
-
-    report_data = await generate_report(
-        db,
-        current_user.id,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    pdf_file = await generate_pdf_report(report_data)
-    return StreamingResponse(
-        pdf_file,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": "attachment; filename=financial_weekly_report.pdf"
-        }
-    )
-
-
-@router.get("/generate/monthly_pdf",
-            summary="Export Monthly PDF report with last 30 days",
-            description="Generate and download a complete financial report in PDF format for the last 30 days")
-async def export_monthly_pdf(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
-    end_date = date.today()
-    start_date = end_date - timedelta(days=7)
-
-    report_data = await generate_report(
-        db,
-        current_user.id,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    pdf_file = await generate_pdf_report(report_data)
-    return StreamingResponse(
-        pdf_file,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": "attachment; filename=financial_monthly_report.pdf"
-        }
-    )
+    if "_" in fmt:
+        legacy_period, fmt = fmt.split("_")
+        if period is not None and period != legacy_period:
+            raise HTTPException(status_code=400, detail=f"Format '{legacy_period}_{fmt}' conflicts with period '{period}'")
+        period = legacy_period
+    period = period or "custom"
+    start_date, end_date = _report_range(period, start_date, end_date, today)
+    suffix = "" if period == "custom" else f"_{period}"
+
+    if fmt == "pdf":
+        report_data = await get_or_build_report(
+            db,
+            current_user.id,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        pdf_file = await generate_pdf_report(report_data)
+        return StreamingResponse(
+            pdf_file,
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": f"attachment; filename=financial{suffix}_report.pdf"
+            }
+        )
 
+    if fmt == "ndjson":
+        # Una transacción por línea, escrita a medida que llega del cursor
+        async def rows():
+            # Sesión propia: la de get_db puede cerrarse antes de que termine el streaming
+            async with AsyncSessionLocal() as session:
+                async for row in iter_report_transactions(session, current_user.id, start_date, end_date):
+                    yield orjson.dumps(row) + b"\n"
+
+        return StreamingResponse(
+            rows(),
+            media_type="application/x-ndjson",
+            headers={
+                "Content-Disposition": f"attachment; filename=transactions{suffix}_{current_user.username}.ndjson"
+            }
+        )
 
-@router.get("/generate/json",
-            summary="Generate JSON Report",
-            description="Generate report as JSON", )
-async def export_json_report(
-        db: AsyncSession = Depends(get_db),
-        start_date: date = None,
-        end_date: date = None,
-        current_user: User = Depends(get_current_user)
-):
-    report_data = await generate_report(
+    data = await get_or_build_report_json(
         db,
         user_id=current_user.id,
         start_date=start_date,
-        end_date=end_date
-    )
-
-    data = report_data.model_dump(mode="json")
-
-    return JSONResponse(
-        content=data,
-        headers={
-            "Content-Disposition": f"attachment; filename=report_{current_user.username}.json"
-        }
-    )
-
-
-@router.get("/generate/custom_json",
-            summary="Generate JSON Report with custom date ranges",
-            description="Generate report as JSON")
-async def export_custom_json_report(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
-        start_date: date = Query(None, description="Start date"),
-        end_date: date = Query(None, description="End date")
-):
-    if start_date and end_date and start_date > end_date:
-        raise HTTPException(status_code=400, detail="Start date must be before end date")
-
-    report_data = await generate_report(
-        db=db,
-        user_id=current_user.id,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    data = report_data.model_dump(mode="json")
-    return JSONResponse(
-        content=data,
-        headers={
-            "Content-Disposition": f"attachment; filename=custom_report_{current_user.username}.json"
-        }
-    )
-
-
-@router.get("/generate/weekly_json",
-            summary="Generate weekly JSON Report",
-            description="Generate report as JSON format for the last 7 days.")
-async def export_weekly_json_report(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
-        end_date: date = date.today(),
-        start_date: date = date.today() - timedelta(days=7)
-):
-    report_data = await generate_report(
-        db=db,
-        user_id=current_user.id,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    data = report_data.model_dump(mode="json")
-    return JSONResponse(
-        content=data,
-        headers={
-            "Content-Disposition": f"attachment; filename=custom_report_{current_user.username}.json"
-        }
-    )
-
-
-@router.get("/generate/monthly_json",
-            summary="Generate monthly JSON Report",
-            description="Generate report as JSON format for the last 30 days.")
-async def export_monthly_json_report(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
-        end_date: date = date.today(),
-        start_date: date = date.today() - timedelta(days=30)
-):
-    report_data = await generate_report(
-        db=db,
-        user_id=current_user.id,
-        start_date=start_date,
         end_date=end_date,
     )
-    data = report_data.model_dump(mode="json")
-    return JSONResponse(
+    return ORJSONResponse(
         content=data,
         headers={
-            "Content-Disposition": f"attachment; filename=custom_report_{current_user.username}.json"
+            "Content-Disposition": f"attachment; filename=report{suffix}_{current_user.username}.json"
         }
     )
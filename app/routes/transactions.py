@@ -1,11 +1,14 @@
 from typing import List, Optional, Dict
 
 from fastapi import APIRouter, Depends, status, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import invalidate_user_cache, dashboard_cache, user_cache_key
 from app.core.database import get_db
 from app.models.user import User
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionListItem, \
+    TransactionStatsResponse, CategoryBreakdownItem
 from app.services.auth_service import get_current_user
 from app.services.transaction_service import (
     get_transactions,
@@ -21,7 +24,7 @@ router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
 @router.get("/",
-            response_model=List[Dict],
+            response_model=List[TransactionListItem],
             summary="Get all user transactions",
             description="Allows the user to get all of their transactions",
             )
@@ -30,12 +33,12 @@ async def list_user_transactions(
         category: Optional[str] = Query(None, description="Filter by category"),
         type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
         dateRange: Optional[str] = Query(None, description="Filter by date range"),
-        minAmount: Optional[str] = Query(None, description="Filter by minimum amount"),
-        maxAmount: Optional[str] = Query(None, description="Filter by maximum amount"),
+        minAmount: Optional[float] = Query(None, description="Filter by minimum amount"),
+        maxAmount: Optional[float] = Query(None, description="Filter by maximum amount"),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    return await get_transactions(
+    transactions = await get_transactions(
         db,
         current_user.id,
         search=search,
@@ -45,10 +48,12 @@ async def list_user_transactions(
         min_amount=minAmount,
         max_amount=maxAmount
     )
+    # get_transactions ya construye la forma de TransactionListItem: se omite la validación de salida
+    return ORJSONResponse(transactions)
 
 
 @router.get("/stats",
-            response_model=Dict,
+            response_model=TransactionStatsResponse,
             summary="Get transaction statistics",
             description="Get statistics about user transactions",
             )
@@ -59,11 +64,14 @@ async def get_user_transaction_stats(
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    return await get_transaction_stats(db, current_user.id, dateRange, category, type)
+    return await dashboard_cache.get_or_compute(
+        user_cache_key(current_user.id, "tx:stats", dateRange, category, type),
+        lambda: get_transaction_stats(db, current_user.id, dateRange, category, type)
+    )
 
 
 @router.get("/category-breakdown",
-            response_model=List[Dict],
+            response_model=List[CategoryBreakdownItem],
             summary="Get category breakdown",
             description="Get breakdown of transactions by category",
             )
@@ -74,11 +82,14 @@ async def get_user_category_breakdown(
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    return await get_category_breakdown(db, current_user.id, dateRange, category, type)
+    return await dashboard_cache.get_or_compute(
+        user_cache_key(current_user.id, "tx:category_breakdown", dateRange, category, type),
+        lambda: get_category_breakdown(db, current_user.id, dateRange, category, type)
+    )
 
 
 @router.get("/{id}",
-            response_model=Dict,
+            response_model=TransactionListItem,
             summary="Get transaction by id",
             description="Allows the user to get a transaction by id",
             )
@@ -97,7 +108,7 @@ async def get_user_transaction(
 
 
 @router.post("/",
-             response_model=Dict,
+             response_model=TransactionListItem,
              status_code=status.HTTP_201_CREATED,
              summary="Create a new transaction",
              description="Allows the authenticated user to create a new transaction associated to an existing category",
@@ -107,11 +118,13 @@ async def create_new_transaction(
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    return await create_transaction(db, current_user.id, transaction)
+    new_transaction = await create_transaction(db, current_user.id, transaction)
+    invalidate_user_cache(current_user.id)
+    return new_transaction
 
 
 @router.put("/{id}",
-            response_model=Dict,
+            response_model=TransactionListItem,
             summary="Update an existing transaction",
             description="Allows the authenticated user to update an existing transaction", )
 async def update_user_transaction(
@@ -123,6 +136,7 @@ async def update_user_transaction(
     tx = await update_transaction(db, current_user.id, id, transaction)
     if not tx:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
+    invalidate_user_cache(current_user.id)
     return tx
 
 
@@ -135,4 +149,6 @@ async def delete_user_transaction(
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    return await delete_transaction(db, current_user.id, id)
+    result = await delete_transaction(db, current_user.id, id)
+    invalidate_user_cache(current_user.id)
+    return result
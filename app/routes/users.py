@@ -1,32 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
+from pydantic import TypeAdapter
+
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 from app.services.auth_service import get_current_user, require_admin
-from app.services.user_service import get_all_users, get_user_by_id, update_user, delete_user
+from app.services.user_service import get_all_users, get_user_by_id, update_user, delete_user, count_users
 from app.core.database import get_db
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+_user_list_adapter = TypeAdapter(List[UserResponse])
+
 
 @router.get("/",
             summary="Retrieve all users in the system",
-            description="This endpoint is restricted to administrators only. Returns a list of all registered users in the system with their basic information.",
+            description="This endpoint is restricted to administrators only. Returns a page of the registered users in the system with their basic information. The total number of users is sent in the X-Total-Count header.",
             response_model=List[UserResponse], dependencies=[Depends(require_admin)])
-async def list_users(db: AsyncSession = Depends(get_db)):
-    return await get_all_users(db)
+async def list_users(
+        skip: int = Query(0, ge=0, description="Number of users to skip"),
+        limit: int = Query(100, ge=1, le=500, description="Maximum number of users to return"),
+        db: AsyncSession = Depends(get_db)
+):
+    users = _user_list_adapter.validate_python(await get_all_users(db, skip, limit), from_attributes=True)
+    # JSON generado directamente por pydantic-core, sin volver a validar en FastAPI
+    return Response(
+        content=_user_list_adapter.dump_json(users),
+        media_type="application/json",
+        headers={"X-Total-Count": str(await count_users(db))},
+    )
 
 @router.get("/me",
             summary="Retrieve the current authenticated user's profile.",
             description="Returns the profile information for the currently authenticated user. This endpoint allows users to view their own profile data.",
             response_model=UserResponse)
-async def get_current_user_profile(
-        current_user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db)
-):
-    return await get_user_by_id(db, current_user.id)
+async def get_current_user_profile(current_user: User = Depends(get_current_user)):
+    return current_user
 @router.put("/me",
             summary="Update the current authenticated user's profile.",
             description="Allows users to update their own profile information. Only the fields provided in the request body will be updated.",
@@ -46,8 +57,8 @@ async def delete_current_user_account(
         current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db)
 ):
-    result = await delete_user(db, current_user.id)
-    return {"message": "Account deleted successfully"}
+    await delete_user(db, current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/{user_id}",
@@ -94,12 +105,9 @@ async def delete_user_by_id(
         user_id: int,
         db: AsyncSession = Depends(get_db)
 ):
-    user = await get_user_by_id(db, user_id)
-    if not user:
+    if not await delete_user(db, user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-
-    result = await delete_user(db, user_id)
-    return {"message": "User deleted successfully"}
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
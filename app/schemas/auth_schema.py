@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class LoginBody(BaseModel):
@@ -60,7 +60,7 @@ class RegisterBody(BaseModel):
         max_length=50,
         pattern="^[a-zA-Z0-9_]+$"  # Only alphanumeric and underscores
     )
-    email: str = Field(
+    email: EmailStr = Field(
         ...,
         description="Email address for the new account. Must be unique and valid.",
         examples=["vicelx.dev@example.com"]
@@ -1,10 +1,22 @@
 from datetime import date
 from typing import Optional, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
-class BudgetBase(BaseModel):
+class _BudgetDatesModel(BaseModel):
+    """Shared start_date/end_date check for budget create and update bodies."""
+
+    @model_validator(mode="after")
+    def validate_dates(self):
+        """Validate that start_date is not after end_date when both are provided."""
+        if self.start_date is not None and self.end_date is not None:
+            if self.start_date > self.end_date:
+                raise ValueError("start_date must be before or equal to end_date")
+        return self
+
+
+class BudgetBase(_BudgetDatesModel):
     """Base budget model with common fields for budget operations."""
 
     name: str = Field(
@@ -49,21 +61,13 @@ class BudgetBase(BaseModel):
         gt=0
     )
 
-    @model_validator(mode="after")
-    def validate_dates(self):
-        """Validate that start_date is not after end_date."""
-        if self.start_date is not None and self.end_date is not None:
-            if self.start_date > self.end_date:
-                raise ValueError("start_date must be before or equal to end_date")
-        return self
-
 
 class BudgetCreate(BudgetBase):
     """Schema for creating a new budget."""
     pass
 
 
-class BudgetUpdate(BaseModel):
+class BudgetUpdate(_BudgetDatesModel):
     """Schema for updating an existing budget. All fields are optional."""
 
     name: Optional[str] = Field(
@@ -108,14 +112,6 @@ class BudgetUpdate(BaseModel):
         gt=0
     )
 
-    @model_validator(mode="after")
-    def validate_dates(self):
-        """Validate that start_date is not after end_date when both are provided."""
-        if self.start_date is not None and self.end_date is not None:
-            if self.start_date > self.end_date:
-                raise ValueError("start_date must be before or equal to end_date")
-        return self
-
 
 class BudgetResponse(BaseModel):
     """Schema for budget responses, including database fields."""
@@ -131,5 +127,4 @@ class BudgetResponse(BaseModel):
     alertThreshold: int
     status: Literal["good", "warning", "over"]
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
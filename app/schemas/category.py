@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class CategoryBase(BaseModel):
@@ -15,4 +15,4 @@ class CategoryResponse(CategoryBase):
     id: int = Field(..., example=1,description="ID of category")
     user_id: int = Field(...,description="User ID")
     transaction_count: int = Field(...,description="Associated category transactions count")
-    model_config = {"from_attributes":True}
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
@@ -1,7 +1,7 @@
 from datetime import date
 from typing import List
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ReportCategory(BaseModel):
@@ -46,8 +46,7 @@ class ReportTransaction(BaseModel):
         examples=["Transportation"]
     )
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class ReportResponse(BaseModel):
@@ -99,5 +98,4 @@ class ReportResponse(BaseModel):
         ]]
     )
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
\ No newline at end of file
@@ -1,14 +1,33 @@
 from datetime import date
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class TransactionStatsResponse(BaseModel):
     """Base schema for transaction stats response"""
     totalTransactions: int = Field(...,example=3, description="Total user transactions.")
     totalIncome: float = Field(...,example=45.0, description="Total transaction incomes.")
     totalExpenses: float = Field(..., example=40.0, description="Total transaction expenses.")
-    averageDaily: float = Field(...,examples=12.4, description="Average daily net balance.")
+    averageDaily: float = Field(...,examples=[12.4], description="Average daily net balance.")
+
+class TransactionListItem(BaseModel):
+    """Transaction as returned by the list, detail, create and update endpoints"""
+    id: str = Field(..., example="1", description="Transaction unique identifier")
+    userId: str = Field(..., example="123", description="ID of the transaction owner")
+    type: str = Field(..., example="expense", description="Transaction type")
+    amount: float = Field(..., example=-50.0, description="Transaction amount")
+    description: Optional[str] = Field(default=None, example="Supermarket shopping", description="Transaction description")
+    category: Optional[str] = Field(default=None, example="Alimentación", description="Category name")
+    transactionDate: str = Field(..., example="2025-09-09", description="Date of the transaction (ISO format)")
+    notes: Optional[str] = Field(default=None, description="Aditional transaction notes")
+    createdAt: Optional[str] = Field(default=None, example="2025-09-09", description="Creation date (ISO format)")
+    updatedAt: Optional[str] = Field(default=None, example="2025-09-09", description="Last update date (ISO format)")
+
+class CategoryBreakdownItem(BaseModel):
+    """Total amount per category and transaction type"""
+    category: str = Field(..., example="Alimentación", description="Category name")
+    type: str = Field(..., example="expense", description="Transaction type")
+    amount: float = Field(..., example=120.5, description="Total absolute amount")
 
 class TransactionFilters(BaseModel):
     search: Optional[str] = None
@@ -30,7 +49,6 @@ class TransactionBase(BaseModel):
 class TransactionCreate(TransactionBase):
     """Schema for creating a new transaction"""
     transaction_date: date = Field(...,example="2025-09-09", description="Date of the transaction")
-    pass
 
 class TransactionUpdate(TransactionBase):
     """Schema for updating an existing transaction"""
@@ -39,15 +57,12 @@ class TransactionUpdate(TransactionBase):
     category_id: Optional[int] = Field(default=None, example=2, description="Updated category ID")
     type: str = Field(..., example="income", description="Transaction type")
     notes: Optional[str] = Field(default=None, example="Bought: 3 eggs and 1 pack of milk.",description="Aditional transaction notes")
-    pass
 
 class TransactionResponse(TransactionBase):
     """Schema for transaction response"""
     id: int = Field(..., example=1, description="Transaction unique identifier")
     user_id: int = Field(..., example=123, description="ID of the transaction owner")
-    type: str = Field(..., example="income", description="Transaction type")
-    notes: Optional[str] = Field(default=None, example="Bought: 3 eggs and 1 pack of milk.", description="Aditional transaction notes")
     transaction_date: date = Field(...,example="2025-09-09", description="Date of the transaction")
 
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserBase(BaseModel):
@@ -14,9 +14,10 @@ class UserBase(BaseModel):
         max_length=50,
         pattern="^[a-zA-Z0-9_]+$"  # Only alphanumeric and underscores
     )
-    email: EmailStr = Field(
+    # Solo se usa en respuestas: el email ya se validó al registrarse/actualizarse
+    email: str = Field(
         ...,
-        description="User's email address. Must be a valid email format.",
+        description="User's email address.",
         examples=["vicelx.dev@example.com"]
     )
     role: str = Field(
@@ -82,5 +83,4 @@ class UserResponse(UserBase):
         examples=[True]
     )
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
\ No newline at end of file
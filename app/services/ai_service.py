@@ -1,22 +1,93 @@
+import asyncio
+import hashlib
 import json
 import os
-import re
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from datetime import date
 from typing import Dict, List
 
 import google.generativeai as genai
+import orjson
 from dotenv import load_dotenv
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
+from app.core.config import LLM_MAX_CONCURRENT_PER_USER, LLM_MAX_CONCURRENT, LLM_TIMEOUT_SECONDS
+from app.models.category import Category
 from app.models.transaction import Transaction
 
 load_dotenv()
 
 genai.configure(api_key=os.getenv("GENAI_API_KEY"))
 
+# Un único modelo para toda la app: reutiliza el cliente y sus conexiones
+_model = genai.GenerativeModel("gemini-2.0-flash")
+_in_flight: dict[str, asyncio.Future] = {}
+_json_decoder = json.JSONDecoder()
+
+# Limita las llamadas concurrentes de cada usuario para que uno solo no agote la cuota.
+# Sólo se guardan los semáforos de usuarios con llamadas en curso o en espera.
+_user_llm_semaphores: dict[int, asyncio.Semaphore] = {}
+_user_llm_holders: dict[int, int] = {}
+# Tope global de peticiones a Gemini en curso, compartido por todos los usuarios
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENT)
+
+
+@asynccontextmanager
+async def user_llm_slot(user_id: int):
+    """Hold one of the user's LLM call slots; the semaphore is dropped once nobody uses it."""
+    semaphore = _user_llm_semaphores.get(user_id)
+    if semaphore is None:
+        semaphore = _user_llm_semaphores[user_id] = asyncio.Semaphore(LLM_MAX_CONCURRENT_PER_USER)
+    _user_llm_holders[user_id] = _user_llm_holders.get(user_id, 0) + 1
+    try:
+        async with semaphore:
+            yield
+    finally:
+        _user_llm_holders[user_id] -= 1
+        if not _user_llm_holders[user_id]:
+            del _user_llm_holders[user_id]
+            del _user_llm_semaphores[user_id]
+
+
+def _prompt_json(value) -> str:
+    """Indented JSON for a prompt; UTF-8 as is, so accents are not sent as \\u escapes."""
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+
+
+async def _call_model(prompt: str):
+    async with _llm_semaphore:
+        try:
+            return await asyncio.wait_for(_model.generate_content_async(prompt), LLM_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="AI service timed out")
+
+
+async def _generate_text(prompt: str) -> str:
+    """
+    Send a prompt to Gemini without blocking the event loop. Concurrent calls
+    with the same prompt share a single upstream request.
+    """
+    key = hashlib.sha256(prompt.encode()).hexdigest()
+    pending = _in_flight.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_call_model(prompt))
+        _in_flight[key] = pending
+        pending.add_done_callback(lambda _: _in_flight.pop(key, None))
+    response = await asyncio.shield(pending)
+    return response.text
+
+
+def category_expense_totals(transactions: List[Dict]) -> Dict[str, float]:
+    """Total spent per category (absolute amounts of the negative transactions), in one pass."""
+    totals = defaultdict(float)
+    for tx in transactions:
+        if tx['amount'] < 0:
+            totals[tx.get('category')] -= tx['amount']
+    return dict(totals)
+
 
 async def predict_future_transactions(user_transactions: list[dict]) -> dict:
     """
@@ -43,10 +114,7 @@ async def predict_future_transactions(user_transactions: list[dict]) -> dict:
     User transactions: {user_transactions}
     """
 
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-
-    return extract_json_from_response(response.text)
+    return extract_json_from_response(await _generate_text(prompt))
 
 
 async def generate_financial_insights(
@@ -67,11 +135,7 @@ async def generate_financial_insights(
     total_expenses = financial_summary.get('monthly_expenses', 0)
     balance = financial_summary.get('total_balance', 0)
 
-    category_expenses = {}
-    for tx in transactions:
-        if tx['amount'] < 0:
-            category = tx.get('category')
-            category_expenses[category] = category_expenses.get(category, 0) + abs(tx['amount'])
+    category_expenses = category_expense_totals(transactions)
 
     budget_status = []
     for budget in budgets:
@@ -92,13 +156,13 @@ async def generate_financial_insights(
     - Tasa de ahorro: {((total_income - total_expenses) / total_income * 100) if total_income > 0 else 0:.1f}%
 
     GASTOS POR CATEGORÍA:
-    {json.dumps(category_expenses, indent=2)}
+    {_prompt_json(category_expenses)}
 
     PRESUPUESTOS EXCEDIDOS:
-    {json.dumps(budget_status, indent=2)}
+    {_prompt_json(budget_status)}
 
     TRANSACCIONES RECIENTES (últimas 10):
-    {json.dumps(transactions[:10], indent=2)}
+    {_prompt_json(transactions[:10])}
 
     INSTRUCCIONES:
     Genera exactamente 3 insights financieros relevantes. DEBE SER JSON VÁLIDO SIN MARKDOWN.
@@ -133,10 +197,7 @@ async def generate_financial_insights(
     """
 
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
-
-        result = extract_json_from_response(response.text)
+        result = extract_json_from_response(await _generate_text(prompt))
 
         if "insights" not in result:
             return generate_fallback_insights(financial_summary, budget_status, category_expenses)
@@ -234,10 +295,7 @@ async def generate_smart_recommendations(
     recommendations = []
     rec_id = 1
 
-    category_expenses = defaultdict(float)
-    for tx in transactions:
-        if tx['amount'] < 0:
-            category_expenses[tx['category']] += abs(tx['amount'])
+    category_expenses = category_expense_totals(transactions)
 
     # High spending category recommendation
     if category_expenses:
@@ -311,10 +369,7 @@ async def generate_risk_analysis(
 
     income_volatility = 0.3
 
-    category_expenses = defaultdict(float)
-    for tx in transactions:
-        if tx['amount'] < 0:
-            category_expenses[tx['category']] += abs(tx['amount'])
+    category_expenses = category_expense_totals(transactions)
 
     if category_expenses and total_expenses > 0:
         max_category_expense = max(category_expenses.values())
@@ -432,37 +487,37 @@ def generate_fallback_insights(financial_summary: Dict, budget_status: List, cat
             "color": "secondary"
         })
 
-    return {"insights": insights}
+    # Marca el resultado para que no se cachee como si viniera de la IA
+    return {"insights": insights, "fallback": True}
 
 
 def extract_json_from_response(text: str) -> dict:
+    """
+    Parse the JSON object in a model response, tolerating surrounding prose
+    or markdown code fences.
+    """
     text = text.strip()
-
-    json_pattern = r'\{.* \}'
-    json_match = re.search(json_pattern, text, re.DOTALL)
-
-    if json_match:
-        json_text = json_match.group()
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+
+    # Decodificar el primer objeto JSON completo a partir de cada "{"; raw_decode
+    # respeta cadenas y escapes e ignora lo que haya después (p. ej. el cierre ```)
+    error = None
+    start = text.find("{")
+    while start != -1:
         try:
-            return json.loads(json_text)
-        except json.JSONDecodeError:
-            pass
-
-    if '```json' in text:
-        text = text.split('```json')[1].split('```')[0]
-    elif '```' in text:
-        text = text.split('```')[1].split('```')[0]
-
-    text = text.strip()
+            return _json_decoder.raw_decode(text, start)[0]
+        except json.JSONDecodeError as e:
+            error = error or e
+            start = text.find("{", start + 1)
 
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        return {
-            "error": "Could not parse AI response as JSON",
-            "raw_response": text,
-            "parsing_error": str(e)
-        }
+    return {
+        "error": "Could not parse AI response as JSON",
+        "raw_response": text,
+        "parsing_error": str(error) if error else "No JSON object found"
+    }
 
 
 async def analyze_spending_trends(transactions: List[Dict]) -> Dict:
@@ -472,62 +527,69 @@ async def analyze_spending_trends(transactions: List[Dict]) -> Dict:
     if not transactions:
         return {"trend": "neutral", "message": "No hay suficientes datos"}
 
-    from collections import defaultdict
     weekly_spending = defaultdict(float)
-
     for tx in transactions:
         if tx['amount'] < 0:
-            tx_date = date.fromisoformat(tx['date'])
-            week = tx_date.isocalendar()[1]
-            weekly_spending[week] += abs(tx['amount'])
-
-        if len(weekly_spending) < 2:
-            return {"trend": "neutral", "message": "Necesitas más historial"}
-
-        weeks = sorted(weekly_spending.items())
-        recent_avg = sum(w[1] for w in weeks[-2:]) / 2
-        older_avg = sum(w[1] for w in weeks[:-2]) / max(len(weeks) - 2, 1)
-
-        if recent_avg > older_avg * 1.2:
-            return {
-                "trend": "increasing",
-                "message": f"Tus gastos han aumentado un {(recent_avg / older_avg - 1) * 100:.1f}% recientemente",
-                "percentage": (recent_avg / older_avg - 1) * 100
-            }
-        elif recent_avg < older_avg * 0.8:
-            return {
-                "trend": "decreasing",
-                "message": f"¡Bien! Has reducido tus gastos un {((1 - recent_avg / older_avg) * 100):.1f}%",
-                "percentage": (1 - recent_avg / older_avg) * 100
-            }
-        else:
-            return {
-                "trend": "stable",
-                "message": "Tus gastos se mantienen estables",
-                "percentage": 0
-            }
+            # (año ISO, semana) para que las semanas se ordenen bien al cambiar de año
+            week = date.fromisoformat(tx['date']).isocalendar()[:2]
+            weekly_spending[week] -= tx['amount']
+
+    # Las dos últimas semanas se comparan con la media de las anteriores
+    if len(weekly_spending) < 3:
+        return {"trend": "neutral", "message": "Necesitas más historial"}
+
+    weeks = sorted(weekly_spending.items())
+    recent_avg = sum(w[1] for w in weeks[-2:]) / 2
+    older_avg = sum(w[1] for w in weeks[:-2]) / (len(weeks) - 2)
+
+    if recent_avg > older_avg * 1.2:
+        return {
+            "trend": "increasing",
+            "message": f"Tus gastos han aumentado un {(recent_avg / older_avg - 1) * 100:.1f}% recientemente",
+            "percentage": (recent_avg / older_avg - 1) * 100
+        }
+    elif recent_avg < older_avg * 0.8:
+        return {
+            "trend": "decreasing",
+            "message": f"¡Bien! Has reducido tus gastos un {((1 - recent_avg / older_avg) * 100):.1f}%",
+            "percentage": (1 - recent_avg / older_avg) * 100
+        }
+    else:
+        return {
+            "trend": "stable",
+            "message": "Tus gastos se mantienen estables",
+            "percentage": 0
+        }
 
 async def get_ai_insights_data(db: AsyncSession, user_id: int) -> Dict:
     """
     Prepare data for AI insights
     """
+    # Sólo las columnas necesarias: filas planas, sin instancias ORM
     recent_transactions = await db.execute(
-        select(Transaction)
-        .options(selectinload(Transaction.category))
+        select(
+            Transaction.id,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.transaction_date,
+            Category.name,
+        )
+        .join(Category, Category.id == Transaction.category_id)
         .where(Transaction.user_id == user_id)
         .order_by(Transaction.transaction_date.desc())
         .limit(100)
     )
 
-    transactions_data = []
-    for transaction in recent_transactions.scalars():
-        transactions_data.append({
-            "id": transaction.id,
-            "amount": float(transaction.amount),
-            "description": transaction.description,
-            "date": transaction.transaction_date.isoformat(),
-            "category": transaction.category.name
-        })
+    transactions_data = [
+        {
+            "id": tx_id,
+            "amount": float(amount),
+            "description": description,
+            "date": tx_date.isoformat(),
+            "category": category_name
+        }
+        for tx_id, amount, description, tx_date, category_name in recent_transactions
+    ]
 
     return {
         "transactions": transactions_data,
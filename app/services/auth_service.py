@@ -1,46 +1,62 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from jwt import PyJWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.core.database import get_db
+from app.core.cache import auth_user_cache
+from app.core.database import AsyncSessionLocal
 from app.models.user import User
 from app.core import security
+from app.services.insights_cache import schedule_insights_warmup
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 async def login_user(username: str, password: str, db: AsyncSession):
     result = await db.execute(select(User).filter(User.username == username))
     user = result.scalars().first()
-    if not user or not security.verify_password(password, user.hashed_password):
+    if not user or not await security.verify_password_async(password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User or password is incorrect",
             headers={"WWW-Authenticate": "Bearer"},
         )
     token = security.create_access_token(data={"sub": user.username})
+    # El dashboard pedirá los insights justo después del login
+    schedule_insights_warmup(user.id)
     return {"access_token": token, "token_type": "bearer"}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Unauthorized",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    payload = security.decode_token(token)
+    try:
+        payload = security.decode_token(token)
+    except PyJWTError:
+        raise credentials_exception
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
 
-    result = await db.execute(select(User).filter(User.username == username))
-    user = result.scalars().first()
+    user = auth_user_cache.get(username)
     if user is None:
-        raise credentials_exception
+        # Sesión propia y corta: la conexión vuelve al pool antes de ejecutar la ruta
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User).filter(User.username == username))
+            user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        auth_user_cache[username] = user
     return user
 
-def require_admin(user: User = Depends(get_current_user)):
-    if user.role != "admin":
+async def require_admin(user: User = Depends(get_current_user)):
+    # El rol se relee de la BD: auth_user_cache puede estar desfasado en otros workers
+    async with AsyncSessionLocal() as db:
+        role = await db.scalar(select(User.role).where(User.id == user.id))
+    if role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have enough permissions.",
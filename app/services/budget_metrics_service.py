@@ -1,5 +1,5 @@
 # app/services/budget_metrics_service.py
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
@@ -9,36 +9,41 @@ from app.models.category import Category
 from app.models.transaction import Transaction
 
 
-async def get_budget_alerts(db: AsyncSession, user_id: int) -> List[Dict]:
+async def get_budgets_with_spent(db: AsyncSession, user_id: int) -> List[Tuple[Budget, str, float]]:
     """
-    Generate alerts for budgets that are approaching or exceeding their limits.
+    Load every budget of the user with its category name and the expenses spent
+    inside the budget dates, in a single query.
     """
-    alerts = []
-
+    spent = (
+        select(func.coalesce(func.sum(Transaction.amount), 0.0))
+        .where(
+            Transaction.user_id == Budget.user_id,
+            Transaction.category_id == Budget.category_id,
+            Transaction.transaction_date >= Budget.start_date,
+            Transaction.transaction_date <= Budget.end_date,
+            Transaction.type == "expense"
+        )
+        .correlate(Budget)
+        .scalar_subquery()
+    )
     result = await db.execute(
-        select(Budget).where(Budget.user_id == user_id)
+        select(Budget, Category.name, spent.label("spent_amount"))
+        .outerjoin(Category, Category.id == Budget.category_id)
+        .where(Budget.user_id == user_id)
     )
-    budgets = result.scalars().all()
+    return [
+        (budget, category_name or "Unknown", float(spent_amount or 0.0))
+        for budget, category_name, spent_amount in result.all()
+    ]
 
-    for budget in budgets:
-        spent_result = await db.execute(
-            select(func.sum(Transaction.amount))
-            .where(
-                Transaction.user_id == user_id,
-                Transaction.category_id == budget.category_id,
-                Transaction.transaction_date >= budget.start_date,
-                Transaction.transaction_date <= budget.end_date,
-                Transaction.type == "expense"
-            )
-        )
-        spent_amount = spent_result.scalar() or 0.0
 
-        category_result = await db.execute(
-            select(Category).where(Category.id == budget.category_id)
-        )
-        category = category_result.scalar_one_or_none()
-        category_name = category.name if category else "Unknown"
+def build_budget_alerts(budgets: List[Tuple[Budget, str, float]]) -> List[Dict]:
+    """
+    Generate alerts for budgets that are approaching or exceeding their limits.
+    """
+    alerts = []
 
+    for budget, category_name, spent_amount in budgets:
         percentage = (spent_amount / budget.amount) * 100 if budget.amount > 0 else 0
 
         if spent_amount > budget.amount:
@@ -68,34 +73,18 @@ async def get_budget_alerts(db: AsyncSession, user_id: int) -> List[Dict]:
 
     return alerts
 
-async def get_budget_overview(db: AsyncSession, user_id: int) -> Dict:
+
+def build_budget_overview(budgets: List[Tuple[Budget, str, float]]) -> Dict:
     """
     Calculate overall budget metrics for the user.
     """
-    result = await db.execute(
-        select(Budget).where(Budget.user_id == user_id)
-    )
-    budgets = result.scalars().all()
-
     total_budget = 0.0
     total_spent = 0.0
     budgets_exceeded = 0
     total_budgets = len(budgets)
 
-    for budget in budgets:
+    for budget, _, spent_amount in budgets:
         total_budget += budget.amount
-
-        spent_result = await db.execute(
-            select(func.sum(Transaction.amount))
-            .where(
-                Transaction.user_id == user_id,
-                Transaction.category_id == budget.category_id,
-                Transaction.transaction_date >= budget.start_date,
-                Transaction.transaction_date <= budget.end_date,
-                Transaction.type == "expense"
-            )
-        )
-        spent_amount = spent_result.scalar() or 0.0
         total_spent += spent_amount
 
         if abs(spent_amount) > budget.amount:
@@ -114,8 +103,75 @@ async def get_budget_overview(db: AsyncSession, user_id: int) -> Dict:
     }
 
 
+def build_budget_performance(budgets: List[Tuple[Budget, str, float]]) -> List[Dict]:
+    """
+    Get performance metrics for each budget (% used, days remaining, etc.)
+    """
+    performance = []
+    today = date.today()
+
+    for budget, category_name, spent_amount in budgets:
+        # Metrics
+        percentage_used = (spent_amount / budget.amount * 100) if budget.amount > 0 else 0
+        days_total = (budget.end_date - budget.start_date).days + 1
+        days_elapsed = (today - budget.start_date).days + 1
+        days_remaining = (budget.end_date - today).days
+
+        expected_spending = (days_elapsed / days_total * budget.amount) if days_total > 0 else 0
+        spending_pace = "on_track"
+        if spent_amount > expected_spending * 1.1:
+            spending_pace = "over_pace"
+        elif spent_amount < expected_spending * 0.9:
+            spending_pace = "under_pace"
+
+        performance.append({
+            "budgetId": budget.id,
+            "categoryName": category_name,
+            "budgetAmount": budget.amount,
+            "spentAmount": abs(spent_amount),
+            "percentageUsed": percentage_used,
+            "daysRemaining": max(0, days_remaining),
+            "daysTotal": days_total,
+            "expectedSpending": expected_spending,
+            "spendingPace": spending_pace,
+            "isActive": budget.start_date <= today <= budget.end_date,
+        })
+
+    return performance
+
+
+async def get_budget_alerts(db: AsyncSession, user_id: int) -> List[Dict]:
+    return build_budget_alerts(await get_budgets_with_spent(db, user_id))
+
+
+async def get_budget_overview(db: AsyncSession, user_id: int) -> Dict:
+    return build_budget_overview(await get_budgets_with_spent(db, user_id))
+
+
+async def get_budget_performance(db: AsyncSession, user_id: int) -> List[Dict]:
+    return build_budget_performance(await get_budgets_with_spent(db, user_id))
+
+
+async def get_all_budget_metrics(db: AsyncSession, user_id: int, start_date: date = None,
+                                 end_date: date = None) -> Dict:
+    """
+    Compute alerts, overview, performance and category breakdown from one budgets
+    query plus one spending aggregate, instead of one round trip per budget and metric.
+    """
+    budgets = await get_budgets_with_spent(db, user_id)
+    breakdown = await get_category_spending_breakdown(
+        db, user_id, start_date, end_date, budgets=[budget for budget, _, _ in budgets]
+    )
+    return {
+        "alerts": build_budget_alerts(budgets),
+        "overview": build_budget_overview(budgets),
+        "performance": build_budget_performance(budgets),
+        "breakdown": breakdown,
+    }
+
 async def get_category_spending_breakdown(db: AsyncSession, user_id: int, start_date: date = None,
-                                          end_date: date = None) -> List[Dict]:
+                                          end_date: date = None,
+                                          budgets: Optional[List[Budget]] = None) -> List[Dict]:
     """
     Get spending breakdown by category for a given period.
     """
@@ -146,18 +202,24 @@ async def get_category_spending_breakdown(db: AsyncSession, user_id: int, start_
         .order_by(func.sum(Transaction.amount).desc())
     )
 
-    breakdown = []
-    for row in result:
-        budget_result = await db.execute(
-            select(Budget)
-            .where(
+    if budgets is None:
+        budgets_result = await db.execute(
+            select(Budget).where(
                 Budget.user_id == user_id,
-                Budget.category_id == row.id,
                 Budget.start_date <= end_date,
                 Budget.end_date >= start_date
             )
         )
-        budget = budget_result.scalar_one_or_none()
+        budgets = budgets_result.scalars().all()
+
+    budgets_by_category = {}
+    for budget in budgets:
+        if budget.start_date <= end_date and budget.end_date >= start_date:
+            budgets_by_category.setdefault(budget.category_id, budget)
+
+    breakdown = []
+    for row in result:
+        budget = budgets_by_category.get(row.id)
 
         breakdown.append({
             "categoryId": row.id,
@@ -203,11 +265,10 @@ async def get_budget_analytics(db: AsyncSession, user_id: int, period: str = "mo
         else:
             end_date = date(today.year, today.month + 1, 1)
 
-    overview = await get_budget_overview(db, user_id)
-
-    category_breakdown = await get_category_spending_breakdown(db, user_id, start_date, end_date)
-
-    alerts = await get_budget_alerts(db, user_id)
+    metrics = await get_all_budget_metrics(db, user_id, start_date, end_date)
+    overview = metrics["overview"]
+    category_breakdown = metrics["breakdown"]
+    alerts = metrics["alerts"]
 
     return {
         "period": period,
@@ -221,62 +282,4 @@ async def get_budget_analytics(db: AsyncSession, user_id: int, period: str = "mo
             "savingsRate": ((overview["totalBudget"] - overview["totalSpent"]) / overview["totalBudget"] * 100) if
             overview["totalBudget"] > 0 else 0,
         }
-    }
-
-async def get_budget_performance(db: AsyncSession, user_id: int) -> List[Dict]:
-    """
-    Get performance metrics for each budget (% used, days remaining, etc.)
-    """
-    result = await db.execute(
-        select(Budget).where(Budget.user_id == user_id)
-    )
-    budgets = result.scalars().all()
-
-    performance = []
-    today = date.today()
-
-    for budget in budgets:
-        spent_result = await db.execute(
-            select(func.sum(Transaction.amount))
-            .where(
-                Transaction.user_id == user_id,
-                Transaction.category_id == budget.category_id,
-                Transaction.transaction_date >= budget.start_date,
-                Transaction.transaction_date <= budget.end_date,
-                Transaction.type == "expense"
-            )
-        )
-        spent_amount = spent_result.scalar() or 0.0
-
-        category_result = await db.execute(
-            select(Category).where(Category.id == budget.category_id)
-        )
-        category = category_result.scalar_one_or_none()
-
-        # Metrics
-        percentage_used = (spent_amount / budget.amount * 100) if budget.amount > 0 else 0
-        days_total = (budget.end_date - budget.start_date).days + 1
-        days_elapsed = (today - budget.start_date).days + 1
-        days_remaining = (budget.end_date - today).days
-
-        expected_spending = (days_elapsed / days_total * budget.amount) if days_total > 0 else 0
-        spending_pace = "on_track"
-        if spent_amount > expected_spending * 1.1:
-            spending_pace = "over_pace"
-        elif spent_amount < expected_spending * 0.9:
-            spending_pace = "under_pace"
-
-        performance.append({
-            "budgetId": budget.id,
-            "categoryName": category.name if category else "Unknown",
-            "budgetAmount": budget.amount,
-            "spentAmount": abs(spent_amount),
-            "percentageUsed": percentage_used,
-            "daysRemaining": max(0, days_remaining),
-            "daysTotal": days_total,
-            "expectedSpending": expected_spending,
-            "spendingPace": spending_pace,
-            "isActive": budget.start_date <= today <= budget.end_date,
-        })
-
-    return performance
\ No newline at end of file
+    }
\ No newline at end of file
@@ -1,10 +1,10 @@
 from typing import Dict, List
 from sqlalchemy import update, delete, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import date
 
 from app.models.budget import Budget
-from app.models.category import Category
 from app.models.transaction import Transaction
 from app.schemas.budget import BudgetCreate, BudgetUpdate
 
@@ -44,11 +44,8 @@ def calculate_status(spent_amount: float, budget_amount: float, alert_threshold:
 
 
 async def budget_to_dict(db: AsyncSession, budget: Budget) -> Dict:
-    """Convert Budget model to dictionary with calculated fields."""
-    category_result = await db.execute(
-        select(Category).where(Category.id == budget.category_id)
-    )
-    category = category_result.scalar_one_or_none()
+    """Convert Budget model to dictionary with calculated fields. Expects budget.category to be loaded."""
+    category = budget.category
 
     spent_amount = await calculate_spent_amount(
         db,
@@ -87,14 +84,16 @@ async def create_budget(db: AsyncSession, user_id: int, budget: BudgetCreate) ->
     )
     db.add(new_budget)
     await db.commit()
-    await db.refresh(new_budget)
+    await db.refresh(new_budget, attribute_names=["category"])
 
     return await budget_to_dict(db, new_budget)
 
 async def get_budgets(db: AsyncSession, user_id: int) -> List[Dict]:
     """Get all budgets for a user."""
     result = await db.execute(
-        select(Budget).where(Budget.user_id == user_id)
+        select(Budget)
+        .options(selectinload(Budget.category))
+        .where(Budget.user_id == user_id)
     )
     budgets = result.scalars().all()
 
@@ -103,7 +102,9 @@ async def get_budgets(db: AsyncSession, user_id: int) -> List[Dict]:
 async def get_budget_by_id(db: AsyncSession, user_id: int, budget_id: int) -> Dict | None:
     """Get a specific budget by ID."""
     result = await db.execute(
-        select(Budget).where(Budget.id == budget_id, Budget.user_id == user_id)
+        select(Budget)
+        .options(selectinload(Budget.category))
+        .where(Budget.id == budget_id, Budget.user_id == user_id)
     )
     budget = result.scalar_one_or_none()
 
@@ -133,15 +134,17 @@ async def update_budget(
         return None
 
     # Refresh para obtener las relaciones
-    await db.refresh(updated_budget)
+    await db.refresh(updated_budget, attribute_names=["category"])
     return await budget_to_dict(db, updated_budget)
 
-async def delete_budget(db: AsyncSession, user_id: int, budget_id: int) -> Dict:
-    query = delete(Budget).where(Budget.id == budget_id, Budget.user_id == user_id)
+async def delete_budget(db: AsyncSession, user_id: int, budget_id: int) -> int | None:
+    """Delete a budget owned by the user. Returns the deleted id, or None if not found."""
+    query = (
+        delete(Budget)
+        .where(Budget.id == budget_id, Budget.user_id == user_id)
+        .returning(Budget.id)
+    )
     result = await db.execute(query)
     await db.commit()
 
-    if result.rowcount == 0:
-        return {"success": False, "message": "Budget not found"}
-
-    return {"success": True, "message": "Budget deleted"}
\ No newline at end of file
+    return result.scalar_one_or_none()
\ No newline at end of file
@@ -1,8 +1,9 @@
-from sqlalchemy import update, delete, and_
+from sqlalchemy import update, delete, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.models.category import Category
+from app.models.transaction import Transaction
 from app.schemas.category import CategoryUpdate, CategoryCreate
 
 
@@ -18,12 +19,12 @@ async def create_category(db: AsyncSession, user_id: int, category: CategoryCrea
 
 
 async def get_categories(db: AsyncSession, user_id: int):
-    from sqlalchemy import func
-    from app.models.transaction import Transaction
-
+    # Una sola consulta agregada; sólo las columnas que se devuelven, sin hidratar entidades
     result = await db.execute(
         select(
-            Category,
+            Category.id,
+            Category.name,
+            Category.user_id,
             func.count(Transaction.id).label('transaction_count')
         )
         .outerjoin(Transaction, and_(
@@ -34,18 +35,15 @@ async def get_categories(db: AsyncSession, user_id: int):
         .group_by(Category.id)
     )
 
-    categories_with_count = []
-    for row in result:
-        category = row[0]
-        count = row[1]
-        categories_with_count.append({
-            "id": category.id,
-            "name": category.name,
-            "user_id": category.user_id,
-            "transaction_count": count or 0
-        })
-
-    return categories_with_count
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "user_id": row.user_id,
+            "transaction_count": row.transaction_count or 0
+        }
+        for row in result
+    ]
 
 
 async def get_category_by_id(db: AsyncSession, user_id: int, category_id: int):
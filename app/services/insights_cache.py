@@ -0,0 +1,117 @@
+import asyncio
+import functools
+import logging
+from typing import Dict, Optional
+
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import user_cache_key, ai_response_cache, llm_cache, content_cache_key
+from app.core.config import AI_CACHE_TTL_SECONDS
+from app.core.database import run_in_session
+from app.services.ai_service import get_ai_insights_data, generate_financial_insights, user_llm_slot
+from app.services.metrics_service import get_budget_overview, calculate_financial_summary
+
+logger = logging.getLogger(__name__)
+
+_insights_data_cache: TTLCache = TTLCache(maxsize=1024, ttl=AI_CACHE_TTL_SECONDS)
+# Generación en curso por usuario; también evita que el GC recoja las tareas
+_warmup_tasks: dict[int, asyncio.Task] = {}
+
+
+async def cached_ai_insights_data(db: AsyncSession, user_id: int) -> Dict:
+    """
+    Return get_ai_insights_data for the user, reusing the last result until
+    their transactions or budgets change or the TTL expires.
+    """
+    key = user_cache_key(user_id, "ai:insights_data")
+    data = _insights_data_cache.get(key)
+    if data is None:
+        data = await get_ai_insights_data(db, user_id)
+        _insights_data_cache[key] = data
+    return data
+
+
+def get_cached_ai_insights(user_id: int) -> Optional[Dict]:
+    """Return the user's cached /ai/ai-insights response, if it is still fresh."""
+    return ai_response_cache.get(user_cache_key(user_id, "ai:insights"))
+
+
+async def get_ai_insights_response(user_id: int) -> Dict:
+    """
+    Build the /ai/ai-insights response for the user. Only insights generated by
+    the AI are cached; the rule-based fallback is retried on the next request.
+    """
+    cache_key = user_cache_key(user_id, "ai:insights")
+    cached = ai_response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    insights_data, budget_data, financial_summary = await asyncio.gather(
+        run_in_session(cached_ai_insights_data, user_id),
+        run_in_session(get_budget_overview, user_id),
+        run_in_session(calculate_financial_summary, user_id),
+    )
+    if not insights_data["transactions"]:
+        return {
+            "success": True,
+            "data": {
+                "insights": [
+                    {
+                        "type": "tip",
+                        "title": "Empieza a registrar transacciones",
+                        "message": "Registra tus gastos e ingresos para obtener análisis personalizados con IA",
+                        "confidence": "Alta",
+                        "icon": "lightbulb",
+                        "color": "secondary"
+                    }
+                ],
+                "message": "No hay suficientes transacciones para generar insights"
+            },
+            "user_id": user_id,
+            "transactions_analyzed": 0
+        }
+
+    async def compute_insights() -> Dict:
+        async with user_llm_slot(user_id):
+            return await generate_financial_insights(
+                transactions=insights_data["transactions"],
+                budgets=budget_data,
+                financial_summary=financial_summary
+            )
+
+    ai_response = await llm_cache.get_or_compute(
+        content_cache_key("financial_insights", insights_data["transactions"], budget_data, financial_summary),
+        compute_insights,
+        # Los insights de respaldo por reglas no se cachean: se reintenta con la IA en la siguiente petición
+        cacheable=lambda response: not response.get("fallback"),
+    )
+    response = {
+        "success": True,
+        "data": ai_response,
+        "transactions_analyzed": len(insights_data["transactions"])
+    }
+    if not ai_response.get("fallback"):
+        ai_response_cache[cache_key] = response
+    return response
+
+
+def _on_warmup_done(user_id: int, task: asyncio.Task) -> None:
+    if _warmup_tasks.get(user_id) is task:
+        del _warmup_tasks[user_id]
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("AI insights generation failed for user %s: %s", user_id, task.exception())
+
+
+def schedule_insights_warmup(user_id: int) -> asyncio.Task:
+    """
+    Build the user's AI insights in the background, reusing the task already
+    running for that user if there is one. Failures are logged; callers that
+    await the task still receive the exception.
+    """
+    task = _warmup_tasks.get(user_id)
+    if task is None or task.done():
+        task = asyncio.create_task(get_ai_insights_response(user_id))
+        _warmup_tasks[user_id] = task
+        task.add_done_callback(functools.partial(_on_warmup_done, user_id))
+    return task
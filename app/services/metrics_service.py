@@ -4,7 +4,7 @@ from typing import Dict, List, Optional
 from sqlalchemy import func, and_, extract
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
 from app.models.budget import Budget
 from app.models.category import Category
@@ -26,99 +26,65 @@ async def calculate_financial_summary(db: AsyncSession, user_id: int) -> Dict:
         # Last day of the last month
         previous_month_end = current_month_start - timedelta(days=1)
 
-        total_balance_result = await db.execute(
-            select(func.sum(Transaction.amount))
-            .where(Transaction.user_id == user_id)
-        )
-        total_balance = total_balance_result.scalar() or 0.0
-
-        # Current month incomes
-        current_income_result = await db.execute(
-            select(func.sum(Transaction.amount))
-            .where(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.amount > 0,
-                    Transaction.transaction_date >= current_month_start,
-                )
-            )
-        )
-        monthly_income = current_income_result.scalar() or 0.0
-
-        # Current month expenses
-        current_expenses_result = await db.execute(
-            select(func.sum(func.abs(Transaction.amount)))
-            .where(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.amount < 0,
-                    Transaction.transaction_date >= current_month_start,
-                )
-            )
-        )
-        monthly_expenses = current_expenses_result.scalar() or 0.0
-
-        # Last month income
-        previous_income_result = await db.execute(
-            select(func.sum(func.abs(Transaction.amount)))
-            .where(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.amount > 0,
-                    Transaction.transaction_date >= previous_month_start,
-                    Transaction.transaction_date < previous_month_end,
-                )
-            )
-        )
-        previous_income = previous_income_result.scalar() or 0.0
-
-        # Last month expenses
-        previous_expenses_result = await db.execute(
-            select(func.sum(func.abs(Transaction.amount)))
-            .where(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.amount < 0,
-                    Transaction.transaction_date >= previous_month_start,
-                    Transaction.transaction_date < previous_month_end,
-                )
-            )
+    # Saldo total e ingresos/gastos del mes actual y del anterior en una sola pasada
+    in_current_month = Transaction.transaction_date >= current_month_start
+    in_previous_month = and_(
+        Transaction.transaction_date >= previous_month_start,
+        Transaction.transaction_date < previous_month_end,
+    )
+    totals = (await db.execute(
+        select(
+            func.sum(Transaction.amount).label("total_balance"),
+            func.sum(Transaction.amount)
+            .filter(Transaction.amount > 0, in_current_month).label("monthly_income"),
+            func.sum(func.abs(Transaction.amount))
+            .filter(Transaction.amount < 0, in_current_month).label("monthly_expenses"),
+            func.sum(Transaction.amount)
+            .filter(Transaction.amount > 0, in_previous_month).label("previous_income"),
+            func.sum(func.abs(Transaction.amount))
+            .filter(Transaction.amount < 0, in_previous_month).label("previous_expenses"),
         )
-        previous_expenses = previous_expenses_result.scalar() or 0.0
-
-        previous_balance = total_balance - (monthly_income - monthly_expenses)
-
-        current_savings = monthly_income - monthly_expenses
-        previous_savings = previous_income - previous_expenses
-
-        def calculate_percentage_change(current: float, previous: float) -> str:
-            if previous == 0:
-                if current == 0:
-                    return "0%"
-                return "+100.0%" if current > 0 else "-100.0%"
-
-            change = ((current - previous) / abs(previous)) * 100.0
-
-            change = round(change, 1)
-            return f"{'+' if change > 0 else ''}{change:.1f}%"
-
-        balance_change = calculate_percentage_change(total_balance, previous_balance)
-        income_change = calculate_percentage_change(monthly_income, previous_income)
-        expenses_change = calculate_percentage_change(monthly_expenses, previous_expenses)
-        savings_change = calculate_percentage_change(current_savings, previous_savings)
-
-        return {
-            "total_balance": round(total_balance, 2),
-            "monthly_income": round(monthly_income, 2),
-            "monthly_expenses": round(monthly_expenses, 2),
-            "saving": round(current_savings, 2),
-            "changes": {
-                "balance": balance_change,
-                "income": income_change,
-                "expenses": expenses_change,
-                "savings": savings_change,
-            }
+        .where(Transaction.user_id == user_id)
+    )).one()
+    total_balance = totals.total_balance or 0.0
+    monthly_income = totals.monthly_income or 0.0
+    monthly_expenses = totals.monthly_expenses or 0.0
+    previous_income = totals.previous_income or 0.0
+    previous_expenses = totals.previous_expenses or 0.0
+
+    previous_balance = total_balance - (monthly_income - monthly_expenses)
+
+    current_savings = monthly_income - monthly_expenses
+    previous_savings = previous_income - previous_expenses
+
+    def calculate_percentage_change(current: float, previous: float) -> str:
+        if previous == 0:
+            if current == 0:
+                return "0%"
+            return "+100.0%" if current > 0 else "-100.0%"
+
+        change = ((current - previous) / abs(previous)) * 100.0
+
+        change = round(change, 1)
+        return f"{'+' if change > 0 else ''}{change:.1f}%"
+
+    balance_change = calculate_percentage_change(total_balance, previous_balance)
+    income_change = calculate_percentage_change(monthly_income, previous_income)
+    expenses_change = calculate_percentage_change(monthly_expenses, previous_expenses)
+    savings_change = calculate_percentage_change(current_savings, previous_savings)
+
+    return {
+        "total_balance": round(total_balance, 2),
+        "monthly_income": round(monthly_income, 2),
+        "monthly_expenses": round(monthly_expenses, 2),
+        "saving": round(current_savings, 2),
+        "changes": {
+            "balance": balance_change,
+            "income": income_change,
+            "expenses": expenses_change,
+            "savings": savings_change,
         }
+    }
 
 
 async def get_monthly_chart_data(db: AsyncSession, user_id: int, months: int = 12) -> List[Dict]:
@@ -128,35 +94,17 @@ async def get_monthly_chart_data(db: AsyncSession, user_id: int, months: int = 1
     end_date = date.today()
     start_date = end_date - timedelta(days=months * 30)
 
-    income_data = await db.execute(
+    monthly_data = await db.execute(
         select(
             extract('year', Transaction.transaction_date).label('year'),
             extract('month', Transaction.transaction_date).label('month'),
-            func.sum(Transaction.amount).label('ingresos')
+            func.sum(Transaction.amount).filter(Transaction.amount > 0).label('ingresos'),
+            func.sum(func.abs(Transaction.amount)).filter(Transaction.amount < 0).label('gastos')
         )
         .where(
             and_(
                 Transaction.user_id == user_id,
-                Transaction.amount > 0,
-                Transaction.transaction_date >= start_date
-            )
-        )
-        .group_by(
-            extract('year', Transaction.transaction_date),
-            extract('month', Transaction.transaction_date)
-        )
-    )
-
-    expense_data = await db.execute(
-        select(
-            extract('year', Transaction.transaction_date).label('year'),
-            extract('month', Transaction.transaction_date).label('month'),
-            func.sum(func.abs(Transaction.amount)).label('gastos')
-        )
-        .where(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.amount < 0,
+                Transaction.amount != 0,
                 Transaction.transaction_date >= start_date
             )
         )
@@ -164,6 +112,7 @@ async def get_monthly_chart_data(db: AsyncSession, user_id: int, months: int = 1
             extract('year', Transaction.transaction_date),
             extract('month', Transaction.transaction_date)
         )
+        .order_by('year', 'month')
     )
 
     months_map = {
@@ -171,24 +120,11 @@ async def get_monthly_chart_data(db: AsyncSession, user_id: int, months: int = 1
         7: "Jul", 8: "Ago", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dic"
     }
 
-    income_dict = {}
-    for row in income_data:
-        key = (int(row.year), int(row.month))
-        income_dict[key] = float(row.ingresos or 0)
-
-    expense_dict = {}
-    for row in expense_data:
-        key = (int(row.year), int(row.month))
-        expense_dict[key] = float(row.gastos or 0)
-
-    # Combinar datos
-    all_months = set(income_dict.keys()) | set(expense_dict.keys())
     data = []
-
-    for year, month in sorted(all_months):
-        month_name = months_map.get(month, str(month))
-        incomes = income_dict.get((year, month), 0.0)
-        expenses = expense_dict.get((year, month), 0.0)
+    for row in monthly_data:
+        month_name = months_map.get(int(row.month), str(int(row.month)))
+        incomes = float(row.ingresos or 0)
+        expenses = float(row.gastos or 0)
         balance = incomes - expenses
 
         data.append({
@@ -221,51 +157,31 @@ async def get_category_chart_data(
     else:
         month_end = date(target_year, target_month + 1, 1) - timedelta(days=1)
 
-    expenses_data = await db.execute(
+    category_data = await db.execute(
         select(
             Category.name.label('category'),
-            func.sum(func.abs(Transaction.amount)).label('amount')
+            func.sum(func.abs(Transaction.amount)).filter(Transaction.amount < 0).label('expenses'),
+            func.sum(Transaction.amount).filter(Transaction.amount > 0).label('incomes')
         )
         .join(Transaction, Category.id == Transaction.category_id)
         .where(
             and_(
                 Transaction.user_id == user_id,
-                Transaction.amount < 0,
+                Transaction.amount != 0,
                 Transaction.transaction_date >= month_start,
                 Transaction.transaction_date <= month_end,
             )
         )
         .group_by(Category.name)
+        .order_by(Category.name)
     )
 
-    incomes_data = await db.execute(
-        select(
-            Category.name.label('category'),
-            func.sum(Transaction.amount).label('amount')
-        )
-        .join(Transaction, Category.id == Transaction.category_id)
-        .where(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.amount > 0,
-                Transaction.transaction_date >= month_start,
-                Transaction.transaction_date <= month_end,
-            )
-        )
-        .group_by(Category.name)
-    )
-
-    expenses_dict = {row.category: float(row.amount or 0) for row in expenses_data}
-    incomes_dict = {row.category: float(row.amount or 0) for row in incomes_data}
-
-    all_categories = set(expenses_dict.keys()) | set(incomes_dict.keys())
-
     data = []
-    for category in sorted(all_categories):
+    for row in category_data:
         data.append({
-            "category": category,
-            "expenses": round(expenses_dict.get(category, 0.0), 2),
-            "incomes": round(incomes_dict.get(category, 0.0), 2)
+            "category": row.category,
+            "expenses": round(float(row.expenses or 0), 2),
+            "incomes": round(float(row.incomes or 0), 2)
         })
 
     return data
@@ -276,7 +192,7 @@ async def get_recent_transactions(db: AsyncSession, user_id: int, limit: int = 1
     """
     recent_transactions = await db.execute(
         select(Transaction)
-        .options(selectinload(Transaction.category))
+        .options(joinedload(Transaction.category))
         .where(Transaction.user_id == user_id)
         .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
         .limit(limit)
@@ -303,9 +219,22 @@ async def get_budget_overview(db: AsyncSession, user_id: int) -> List[Dict]:
     current_month_start = date.today().replace(day=1)
     current_month_end = date.today()
 
-    budgets_query = await db.execute(
-        select(Budget)
-        .options(selectinload(Budget.category))
+    # Gasto de cada presupuesto dentro del mes en curso, en la misma consulta
+    spent = (
+        select(func.coalesce(func.sum(func.abs(Transaction.amount)), 0))
+        .where(
+            Transaction.user_id == Budget.user_id,
+            Transaction.category_id == Budget.category_id,
+            Transaction.amount < 0,
+            Transaction.transaction_date >= func.greatest(Budget.start_date, current_month_start),
+            Transaction.transaction_date <= func.least(Budget.end_date, current_month_end),
+        )
+        .correlate(Budget)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(Budget.amount, Category.name.label("category_name"), spent.label("spent"))
+        .outerjoin(Category, Category.id == Budget.category_id)
         .where(
             and_(
                 Budget.user_id == user_id,
@@ -316,23 +245,10 @@ async def get_budget_overview(db: AsyncSession, user_id: int) -> List[Dict]:
     )
 
     data = []
-    for budget in budgets_query.scalars():
-        spent_query = await db.execute(
-            select(func.sum(func.abs(Transaction.amount)))
-            .where(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.category_id == budget.category_id,
-                    Transaction.amount < 0,
-                    Transaction.transaction_date >= max(budget.start_date, current_month_start),
-                    Transaction.transaction_date <= min(budget.end_date, current_month_end),
-                )
-            )
-        )
-
-        spent = float(spent_query.scalar() or 0)
-        budget_amount = float(budget.amount)
-        percentage = (spent / budget_amount) * 100 if budget_amount > 0 else 0
+    for row in result:
+        spent_amount = float(row.spent or 0)
+        budget_amount = float(row.amount)
+        percentage = (spent_amount / budget_amount) * 100 if budget_amount > 0 else 0
         if percentage > 100:
             status = "over"
         elif percentage >= 80:
@@ -341,12 +257,28 @@ async def get_budget_overview(db: AsyncSession, user_id: int) -> List[Dict]:
             status = "good"
 
         data.append({
-            "category": budget.category.name,
-            "spent": round(spent, 2),
+            "category": row.category_name or "Unknown",
+            "spent": round(spent_amount, 2),
             "budget": round(budget_amount, 2),
             "percentage": round(percentage, 1),
-            "remaining": round(max(budget_amount - spent, 0), 2),
+            "remaining": round(max(budget_amount - spent_amount, 0), 2),
             "status": status
         })
 
     return data
+
+
+def get_budget_status_stats(budget_data: List[Dict]) -> Dict:
+    """
+    Count budgets per status from get_budget_overview in a single pass.
+    """
+    counts = {"over": 0, "warning": 0, "good": 0}
+    for budget in budget_data:
+        counts[budget["status"]] += 1
+
+    return {
+        "total_budgets": len(budget_data),
+        "over_budget_count": counts["over"],
+        "warning_budget_count": counts["warning"],
+        "good_budget_count": counts["good"],
+    }
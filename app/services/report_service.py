@@ -1,8 +1,12 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta, datetime
 from io import BytesIO
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
-from matplotlib import pyplot as plt
+# Figure (sin pyplot) no usa estado global, así que se puede dibujar desde varios hilos
+from matplotlib.figure import Figure
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
@@ -10,13 +14,18 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
+from app.core.cache import report_cache, user_cache_key
+from app.core.config import PDF_RENDER_WORKERS
+from app.models.category import Category
 from app.models.transaction import Transaction
 from app.schemas.report_schema import ReportResponse, ReportTransaction, ReportCategory
 from app.services.budget_metrics_service import get_category_spending_breakdown
 from app.services.metrics_service import get_category_chart_data
 
+_pdf_executor = ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix="pdf-render")
+
 
 async def generate_report(
         db: AsyncSession,
@@ -24,7 +33,7 @@ async def generate_report(
         start_date: Optional[date] = None,
         end_date: Optional[date] = None) -> ReportResponse:
 
-    query = select(Transaction).options(selectinload(Transaction.category)).where(Transaction.user_id == user_id)
+    query = select(Transaction).options(joinedload(Transaction.category)).where(Transaction.user_id == user_id)
 
     if start_date:
         query = query.where(Transaction.transaction_date >= start_date)
@@ -80,6 +89,64 @@ async def generate_report(
     )
 
 
+async def get_or_build_report(
+        db: AsyncSession,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None) -> ReportResponse:
+    """generate_report, reused across exports of the same range until the user's data changes."""
+    return await report_cache.get_or_compute(
+        user_cache_key(user_id, "report", start_date, end_date),
+        lambda: generate_report(db, user_id, start_date, end_date)
+    )
+
+
+async def get_or_build_report_json(
+        db: AsyncSession,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None) -> Dict:
+    """JSON-ready dump of get_or_build_report, cached so repeat exports skip serialization."""
+    async def build() -> Dict:
+        report = await get_or_build_report(db, user_id, start_date, end_date)
+        return report.model_dump(mode="json")
+
+    return await report_cache.get_or_compute(user_cache_key(user_id, "report:json", start_date, end_date), build)
+
+
+async def iter_report_transactions(
+        db: AsyncSession,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None) -> AsyncIterator[Dict]:
+    """
+    Yield the report's transactions one by one from a server-side cursor, in the
+    JSON shape of ReportTransaction, without loading the whole range in memory.
+    """
+    query = (
+        select(Transaction.id, Transaction.amount, Transaction.description,
+               Transaction.transaction_date, Category.name)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.transaction_date, Transaction.id)
+        .execution_options(yield_per=500)
+    )
+    if start_date:
+        query = query.where(Transaction.transaction_date >= start_date)
+    if end_date:
+        query = query.where(Transaction.transaction_date <= end_date)
+
+    result = await db.stream(query)
+    async for tx_id, amount, description, tx_date, category_name in result:
+        yield {
+            "id": tx_id,
+            "amount": amount,
+            "description": description,
+            "report_date": tx_date.isoformat(),
+            "category": category_name or "Sin categoría",
+        }
+
+
 async def generate_pdf_report(
         report_data: ReportResponse,
         filters: Optional[Dict] = None,
@@ -87,6 +154,30 @@ async def generate_pdf_report(
         expense_analysis: Optional[List[Dict]] = None,
         income_analysis: Optional[List[Dict]] = None,
         trend_data: Optional[List[Dict]] = None
+) -> BytesIO:
+    """Render the PDF on the report thread pool so the event loop keeps serving requests."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _pdf_executor,
+        functools.partial(
+            generate_pdf_report_sync,
+            report_data,
+            filters,
+            financial_summary,
+            expense_analysis,
+            income_analysis,
+            trend_data,
+        )
+    )
+
+
+def generate_pdf_report_sync(
+        report_data: ReportResponse,
+        filters: Optional[Dict] = None,
+        financial_summary: Optional[Dict] = None,
+        expense_analysis: Optional[List[Dict]] = None,
+        income_analysis: Optional[List[Dict]] = None,
+        trend_data: Optional[List[Dict]] = None
 ) -> BytesIO:
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
@@ -200,24 +291,26 @@ async def generate_pdf_report(
             categories = [cat.category for cat in income_categories]
             amounts = [float(cat.net_category_balance) for cat in income_categories]
 
-            plt.figure(figsize=(8, 4.5))
-            bars = plt.bar(categories, amounts, color="#2d5a3d", edgecolor="#1a472a", linewidth=1.5)
+            fig = Figure(figsize=(8, 4.5))
+            ax = fig.subplots()
+            bars = ax.bar(categories, amounts, color="#2d5a3d", edgecolor="#1a472a", linewidth=1.5)
 
             max_amount = max(amounts)
             for bar, amount in zip(bars, amounts):
-                plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + max_amount * 0.02,
-                         f'€{amount:.2f}', ha='center', va='bottom', fontsize=10, color="#1a472a", fontweight='bold')
+                ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + max_amount * 0.02,
+                        f'€{amount:.2f}', ha='center', va='bottom', fontsize=10, color="#1a472a", fontweight='bold')
 
-            plt.title("Ingresos por Categoría", fontsize=14, fontweight="bold", color="#1a472a", pad=20)
-            plt.xlabel("Categorías", fontsize=12, color="#2d5a3d")
-            plt.ylabel("Cantidad (€)", fontsize=12, color="#2d5a3d")
-            plt.xticks(rotation=45, ha="right", color="#2d5a3d")
-            plt.yticks(color="#2d5a3d")
-            plt.ylim(0, max_amount * 1.15)  # Agregar espacio arriba para las etiquetas
-            plt.tight_layout()
+            ax.set_title("Ingresos por Categoría", fontsize=14, fontweight="bold", color="#1a472a", pad=20)
+            ax.set_xlabel("Categorías", fontsize=12, color="#2d5a3d")
+            ax.set_ylabel("Cantidad (€)", fontsize=12, color="#2d5a3d")
+            ax.tick_params(axis="x", labelrotation=45, labelcolor="#2d5a3d")
+            ax.tick_params(axis="y", labelcolor="#2d5a3d")
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment("right")
+            ax.set_ylim(0, max_amount * 1.15)  # Agregar espacio arriba para las etiquetas
+            fig.tight_layout()
 
-            plt.savefig(buffer_income, format="png", dpi=100, bbox_inches='tight')
-            plt.close()
+            fig.savefig(buffer_income, format="png", dpi=100, bbox_inches='tight')
 
             buffer_income.seek(0)
             income_image = Image(buffer_income, width=5 * inch, height=2.8 * inch)
@@ -237,24 +330,26 @@ async def generate_pdf_report(
             categories = [cat.category for cat in expense_categories]
             amounts = [abs(float(cat.net_category_balance)) for cat in expense_categories]
 
-            plt.figure(figsize=(8, 4.5))
-            bars = plt.bar(categories, amounts, color="#dc2626", edgecolor="#991b1b", linewidth=1.5)
+            fig = Figure(figsize=(8, 4.5))
+            ax = fig.subplots()
+            bars = ax.bar(categories, amounts, color="#dc2626", edgecolor="#991b1b", linewidth=1.5)
 
             max_amount = max(amounts)
             for bar, amount in zip(bars, amounts):
-                plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + max_amount * 0.02,
-                         f'€{amount:.2f}', ha='center', va='bottom', fontsize=10, color="#991b1b", fontweight='bold')
+                ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + max_amount * 0.02,
+                        f'€{amount:.2f}', ha='center', va='bottom', fontsize=10, color="#991b1b", fontweight='bold')
 
-            plt.title("Gastos por Categoría", fontsize=14, fontweight="bold", color="#991b1b", pad=20)
-            plt.xlabel("Categorías", fontsize=12, color="#dc2626")
-            plt.ylabel("Cantidad (€)", fontsize=12, color="#dc2626")
-            plt.xticks(rotation=45, ha="right", color="#dc2626")
-            plt.yticks(color="#dc2626")
-            plt.ylim(0, max_amount * 1.15)  # Agregar espacio arriba para las etiquetas
-            plt.tight_layout()
+            ax.set_title("Gastos por Categoría", fontsize=14, fontweight="bold", color="#991b1b", pad=20)
+            ax.set_xlabel("Categorías", fontsize=12, color="#dc2626")
+            ax.set_ylabel("Cantidad (€)", fontsize=12, color="#dc2626")
+            ax.tick_params(axis="x", labelrotation=45, labelcolor="#dc2626")
+            ax.tick_params(axis="y", labelcolor="#dc2626")
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment("right")
+            ax.set_ylim(0, max_amount * 1.15)  # Agregar espacio arriba para las etiquetas
+            fig.tight_layout()
 
-            plt.savefig(buffer_expense, format="png", dpi=100, bbox_inches='tight')
-            plt.close()
+            fig.savefig(buffer_expense, format="png", dpi=100, bbox_inches='tight')
 
             buffer_expense.seek(0)
             expense_image = Image(buffer_expense, width=5 * inch, height=2.8 * inch)
@@ -344,20 +439,22 @@ async def generate_pdf_report(
             incomes = [item['income'] for item in trend_data]
             expenses = [item['expenses'] for item in trend_data]
 
-            plt.figure(figsize=(8, 4))
-            plt.plot(periods, incomes, marker='o', color="#2d5a3d", linewidth=2, label='Ingresos')
-            plt.plot(periods, expenses, marker='o', color="#dc2626", linewidth=2, label='Gastos')
+            fig = Figure(figsize=(8, 4))
+            ax = fig.subplots()
+            ax.plot(periods, incomes, marker='o', color="#2d5a3d", linewidth=2, label='Ingresos')
+            ax.plot(periods, expenses, marker='o', color="#dc2626", linewidth=2, label='Gastos')
 
-            plt.title("Tendencias Financieras", fontsize=14, fontweight="bold", color="#1a472a")
-            plt.xlabel("Período", fontsize=12)
-            plt.ylabel("Cantidad (€)", fontsize=12)
-            plt.xticks(rotation=45, ha="right")
-            plt.legend()
-            plt.grid(True, alpha=0.3)
-            plt.tight_layout()
+            ax.set_title("Tendencias Financieras", fontsize=14, fontweight="bold", color="#1a472a")
+            ax.set_xlabel("Período", fontsize=12)
+            ax.set_ylabel("Cantidad (€)", fontsize=12)
+            ax.tick_params(axis="x", labelrotation=45)
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment("right")
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+            fig.tight_layout()
 
-            plt.savefig(buffer_trend, format="png", dpi=100, bbox_inches='tight')
-            plt.close()
+            fig.savefig(buffer_trend, format="png", dpi=100, bbox_inches='tight')
 
             buffer_trend.seek(0)
             trend_image = Image(buffer_trend, width=5 * inch, height=2.5 * inch)
@@ -719,7 +816,7 @@ async def export_report_by_filters(
         start_date = end_date - timedelta(days=30)
 
     # Generate the base report
-    report_data = await generate_report(db, user_id, start_date, end_date)
+    report_data = await get_or_build_report(db, user_id, start_date, end_date)
 
     if format_type == 'pdf':
         # Obtener datos adicionales para el PDF
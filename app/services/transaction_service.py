@@ -1,4 +1,5 @@
 from datetime import date, timedelta
+from functools import lru_cache
 from typing import Dict, Optional, List
 
 from sqlalchemy import update, delete, func
@@ -10,6 +11,17 @@ from app.models.transaction import Transaction
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
 
 
+# Días que cubre cada valor del filtro dateRange ("all" o ausente: sin límite)
+_DATE_RANGE_DAYS = {"today": 0, "week": 7, "month": 30, "quarter": 90, "year": 365}
+
+
+@lru_cache(maxsize=32)
+def _date_range_start(date_range: Optional[str], today: date) -> Optional[date]:
+    """First date included by a dateRange filter, or None when it has no lower bound."""
+    days = _DATE_RANGE_DAYS.get(date_range)
+    return today - timedelta(days=days) if days is not None else None
+
+
 async def create_transaction(db: AsyncSession, user_id: int, transaction: TransactionCreate) -> Dict:
     new_transaction = Transaction(
         user_id=user_id,
@@ -28,8 +40,8 @@ async def create_transaction(db: AsyncSession, user_id: int, transaction: Transa
     )
     category = category_result.scalar_one_or_none()
     return {
-        "id": new_transaction.id,
-        "userId": new_transaction.user_id,
+        "id": str(new_transaction.id),
+        "userId": str(new_transaction.user_id),
         "type": new_transaction.type,
         "amount": new_transaction.amount,
         "description": new_transaction.description,
@@ -66,23 +78,11 @@ async def get_transactions(db: AsyncSession,
     if max_amount is not None:
         query = query.where(Transaction.amount <= max_amount)
 
-    if date_range:
-        today = date.today()
-
-        if date_range == "today":
-            query = query.where(Transaction.transaction_date == today)
-        elif date_range == "week":
-            week_ago = today - timedelta(days=7)
-            query = query.where(Transaction.transaction_date >= week_ago)
-        elif date_range == "month":
-            month_ago = today - timedelta(days=30)
-            query = query.where(Transaction.transaction_date >= month_ago)
-        elif date_range == "quarter":
-            quarter_ago = today - timedelta(days=90)
-            query = query.where(Transaction.transaction_date >= quarter_ago)
-        elif date_range == "year":
-            year_ago = today - timedelta(days=365)
-            query = query.where(Transaction.transaction_date >= year_ago)
+    start_date = _date_range_start(date_range, date.today())
+    if date_range == "today":
+        query = query.where(Transaction.transaction_date == start_date)
+    elif start_date:
+        query = query.where(Transaction.transaction_date >= start_date)
 
     query = query.order_by(Transaction.transaction_date.desc())
 
@@ -138,74 +138,47 @@ async def get_transaction_stats(db: AsyncSession, user_id: int,
                                 category: Optional[str] = None,
                                 transaction_type: Optional[str] = None) -> Dict:
     """Get transaction statistics"""
-    query = select(Transaction).where(Transaction.user_id == user_id)
-
     today = date.today()
-    start_date = None
-    days_count = 30
-
-    if date_range:
-        if date_range == "today":
-            start_date = today
-            days_count = 1
-        elif date_range == "week":
-            start_date = today - timedelta(days=7)
-            days_count = 7
-        elif date_range == "month":
-            start_date = today - timedelta(days=30)
-            days_count = 30
-        elif date_range == "quarter":
-            start_date = today - timedelta(days=90)
-            days_count = 90
-        elif date_range == "year":
-            start_date = today - timedelta(days=365)
-            days_count = 365
-        elif date_range == "all":
-            start_date = None
-            first_transaction = await db.execute(
-                select(func.min(Transaction.transaction_date))
-                .where(Transaction.user_id == user_id)
-            )
-            first_date = first_transaction.scalar()
-            if first_date:
-                days_count = (today - first_date).days + 1
-            else:
-                days_count = 1
+
+    # Conteo y totales en una sola consulta agregada, sin cargar las transacciones
+    query = select(
+        func.count(Transaction.id).label("total_transactions"),
+        func.sum(func.abs(Transaction.amount)).filter(Transaction.type == "income").label("total_income"),
+        func.sum(func.abs(Transaction.amount)).filter(Transaction.type == "expense").label("total_expenses"),
+    ).where(Transaction.user_id == user_id)
+
+    if date_range in _DATE_RANGE_DAYS:
+        days_count = max(_DATE_RANGE_DAYS[date_range], 1)
+        query = query.where(Transaction.transaction_date >= _date_range_start(date_range, today))
+    elif date_range and date_range != "all":
+        days_count = 30
     else:
-        first_transaction = await db.execute(
+        # Sin rango: el promedio diario cubre desde la primera transacción del usuario
+        first_date = (
             select(func.min(Transaction.transaction_date))
             .where(Transaction.user_id == user_id)
+            .scalar_subquery()
         )
-        first_date = first_transaction.scalar()
-        if first_date:
-            days_count = (today - first_date).days + 1
-            start_date = None
-        else:
-            days_count = 30
-            start_date = None
-    if start_date:
-        query = query.where(Transaction.transaction_date >= start_date)
+        query = query.add_columns(first_date.label("first_date"))
+        days_count = None
 
     if category:
-        category_result = await db.execute(
-            select(Category).where(
-                Category.user_id == user_id,
-                Category.name == category
-            )
-        )
-        category_obj = category_result.scalar_one_or_none()
-        if category_obj:
-            query = query.where(Transaction.category_id == category_obj.id)
+        query = query.join(Category, Transaction.category_id == Category.id).where(Category.name == category)
 
     if transaction_type and transaction_type in ["income", "expense"]:
         query = query.where(Transaction.type == transaction_type)
 
-    result = await db.execute(query)
-    transactions = result.scalars().all()
+    row = (await db.execute(query)).one()
 
-    total_transactions = len(transactions)
-    total_income = sum(abs(transaction.amount) for transaction in transactions if transaction.type == "income")
-    total_expenses = sum(abs(transaction.amount) for transaction in transactions if transaction.type == "expense")
+    if days_count is None:
+        if row.first_date:
+            days_count = (today - row.first_date).days + 1
+        else:
+            days_count = 1 if date_range == "all" else 30
+
+    total_transactions = row.total_transactions
+    total_income = row.total_income or 0.0
+    total_expenses = row.total_expenses or 0.0
 
     # Balance neto = ingresos - gastos
     net_balance = total_income - total_expenses
@@ -234,36 +207,12 @@ async def get_category_breakdown(db: AsyncSession, user_id: int, date_range: Opt
         .where(Transaction.user_id == user_id)
     )
 
-    if date_range:
-        today = date.today()
-        start_date = None
-
-        if date_range == "today":
-            start_date = today
-        elif date_range == "week":
-            start_date = today - timedelta(days=7)
-        elif date_range == "month":
-            start_date = today - timedelta(days=30)
-        elif date_range == "quarter":
-            start_date = today - timedelta(days=90)
-        elif date_range == "year":
-            start_date = today - timedelta(days=365)
-        elif date_range == "all":
-            start_date = None
-
-        if start_date:
-            query = query.where(Transaction.transaction_date >= start_date)
+    start_date = _date_range_start(date_range, date.today())
+    if start_date:
+        query = query.where(Transaction.transaction_date >= start_date)
 
     if category:
-        category_result = await db.execute(
-            select(Category).where(
-                Category.user_id == user_id,
-                Category.name == category
-            )
-        )
-        category_obj = category_result.scalar_one_or_none()
-        if category_obj:
-            query = query.where(Transaction.category_id == category_obj.id)
+        query = query.where(Category.name == category)
 
     if transaction_type and transaction_type in ["income", "expense"]:
         query = query.where(Transaction.type == transaction_type)
@@ -285,30 +234,33 @@ async def get_category_breakdown(db: AsyncSession, user_id: int, date_range: Opt
 
 async def update_transaction(db: AsyncSession, user_id: int, transaction_id: int,
                              transaction_update: TransactionUpdate) -> Optional[Dict]:
+    # Nombre de la categoría (posiblemente nueva) en el mismo RETURNING, sin un SELECT posterior
+    category_name = (
+        select(Category.name)
+        .where(Category.id == Transaction.category_id)
+        .correlate(Transaction)
+        .scalar_subquery()
+    )
     query = (
         update(Transaction)
         .where(Transaction.id == transaction_id, Transaction.user_id == user_id)
         .values(transaction_update.model_dump(exclude_unset=True))
-        .returning(Transaction)
+        .returning(Transaction, category_name)
     )
     result = await db.execute(query)
+    row = result.one_or_none()
     await db.commit()
-    updated_transaction = result.scalars().one_or_none()
-    if not updated_transaction:
+    if not row:
         return None
 
-    category_result = await db.execute(
-        select(Category).where(Category.id == updated_transaction.category_id)
-    )
-    category = category_result.scalar_one_or_none()
-
+    updated_transaction, category = row
     return {
         "id": str(updated_transaction.id),
         "userId": str(updated_transaction.user_id),
         "type": updated_transaction.type,
         "amount": updated_transaction.amount,
         "description": updated_transaction.description,
-        "category": category.name,
+        "category": category,
         "transactionDate": updated_transaction.transaction_date.isoformat(),
         "notes": updated_transaction.notes,
         "createdAt": updated_transaction.created_at.isoformat() if updated_transaction.created_at else None,
@@ -1,9 +1,14 @@
+import logging
+
 from fastapi import HTTPException, status
-from sqlalchemy import delete
+from cachetools import TTLCache
+from sqlalchemy import delete, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
 
-from app.core.security import hash_password
+from app.core.cache import auth_user_cache
+from app.core.security import hash_password_async
 from app.models.category import Category
 from app.models.user import User
 from app.schemas.user import UserUpdate
@@ -19,10 +24,23 @@ DEFAULT_CATEGORIES = [
     "Otros"
 ]
 
-async def get_all_users(db: AsyncSession):
-    result = await db.execute(select(User))
+logger = logging.getLogger(__name__)
+
+# Total de usuarios para la paginación del listado de administración
+_user_count_cache: TTLCache = TTLCache(maxsize=1, ttl=30)
+
+async def get_all_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(User).order_by(User.id).offset(skip).limit(limit))
     return result.scalars().all()
 
+async def count_users(db: AsyncSession) -> int:
+    """Total number of users, cached for a few seconds so paging does not count on every request."""
+    total = _user_count_cache.get("total")
+    if total is None:
+        total = (await db.execute(select(func.count(User.id)))).scalar_one()
+        _user_count_cache["total"] = total
+    return total
+
 async def get_user_by_id(db: AsyncSession, user_id: int):
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalars().first()
@@ -42,7 +60,7 @@ async def register_user(db: AsyncSession, first_name: str, last_name: str, usern
         )
 
     try:
-        hashed_pwd = hash_password(password)
+        hashed_pwd = await hash_password_async(password)
         new_user = User(
             first_name=first_name,
             last_name=last_name,
@@ -56,7 +74,7 @@ async def register_user(db: AsyncSession, first_name: str, last_name: str, usern
         # Flush para obtener el ID del usuario sin hacer commit
         await db.flush()
 
-        print(f"Usuario creado con ID: {new_user.id}")
+        logger.debug("Usuario creado con ID: %s", new_user.id)
 
         # Crear categorías por defecto en la misma transacción
         for category_name in DEFAULT_CATEGORIES:
@@ -65,46 +83,58 @@ async def register_user(db: AsyncSession, first_name: str, last_name: str, usern
                 name=category_name
             )
             db.add(new_category)
-            print(f"Añadiendo categoría: {category_name} para usuario {new_user.id}")
+            logger.debug("Añadiendo categoría: %s para usuario %s", category_name, new_user.id)
 
         # Commit único para usuario y categorías
         await db.commit()
         await db.refresh(new_user)
 
-        print(f"Usuario y categorías guardados exitosamente")
+        logger.debug("Usuario y categorías guardados exitosamente")
 
         return new_user
 
     except Exception as e:
         await db.rollback()
-        print(f"Error al registrar usuario: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al registrar usuario: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating user: {str(e)}"
         )
 
 async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate):
-    updated_user = await get_user_by_id(db, user_id)
-    if not updated_user:
-        raise HTTPException(status_code=404, detail="User not found")
     updated_user_data = user_update.model_dump(exclude_unset=True)
-
+    if not updated_user_data:
+        return await get_user_by_id(db, user_id)
 
     if "password" in updated_user_data:
         password = updated_user_data.pop("password")
-        updated_user_data["hashed_password"] = hash_password(password)
-
-    for field, value in updated_user_data.items():
-        setattr(updated_user, field, value)
-
+        updated_user_data["hashed_password"] = await hash_password_async(password)
+
+    # UPDATE ... FROM sobre la misma fila: devuelve el usuario actualizado y su username
+    # anterior (para invalidar la caché de autenticación) en un solo viaje.
+    previous = aliased(User)
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, previous.id == User.id)
+        .values(updated_user_data)
+        .returning(User, previous.username)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.one_or_none()
     await db.commit()
-    await db.refresh(updated_user)
+    if not row:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    updated_user, previous_username = row
+    auth_user_cache.pop(previous_username, None)
     return updated_user
 
-async def delete_user(db: AsyncSession, user_id: int):
-    query = (delete(User).where(User.id == user_id))
-    await db.execute(query)
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    """Delete the user; returns False if it did not exist."""
+    query = (delete(User).where(User.id == user_id).returning(User.username))
+    username = (await db.execute(query)).scalar_one_or_none()
     await db.commit()
-    return {"message": "User deleted."}
+    if username is None:
+        return False
+    auth_user_cache.pop(username, None)
+    return True
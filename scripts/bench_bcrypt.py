@@ -0,0 +1,32 @@
+"""
+Measure bcrypt verify time on this host and recommend a BCRYPT_COST.
+
+Usage: python scripts/bench_bcrypt.py [target_ms]
+"""
+import sys
+import time
+
+import bcrypt
+
+TARGET_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+PASSWORD = b"SecurePassword123!"
+
+
+def measure(rounds: int, samples: int = 3) -> float:
+    hashed = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds=rounds))
+    start = time.perf_counter()
+    for _ in range(samples):
+        bcrypt.checkpw(PASSWORD, hashed)
+    return (time.perf_counter() - start) / samples * 1000
+
+
+if __name__ == "__main__":
+    recommended = 10
+    for rounds in range(10, 16):
+        elapsed = measure(rounds)
+        print(f"cost={rounds:2d}  verify={elapsed:8.1f} ms")
+        if elapsed <= TARGET_MS:
+            recommended = rounds
+        else:
+            break
+    print(f"Recommended BCRYPT_COST for {TARGET_MS:.0f} ms target: {recommended}")
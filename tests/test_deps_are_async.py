@@ -0,0 +1,30 @@
+import inspect
+
+from fastapi.routing import APIRoute
+
+from app.main import app
+
+
+def _is_async(call) -> bool:
+    # Las dependencias de clase (p. ej. OAuth2PasswordBearer) son async en __call__
+    if not (inspect.isfunction(call) or inspect.ismethod(call)):
+        call = getattr(call, "__call__", call)
+    return inspect.iscoroutinefunction(call) or inspect.isasyncgenfunction(call)
+
+
+def _walk(dependant):
+    yield dependant
+    for sub in dependant.dependencies:
+        yield from _walk(sub)
+
+
+def test_endpoints_and_dependencies_are_async():
+    """Sync endpoints or dependencies would be offloaded to the threadpool on every request."""
+    offenders = {
+        f"{route.path}: {getattr(dependant.call, '__qualname__', dependant.call)!r}"
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for dependant in _walk(route.dependant)
+        if dependant.call is not None and not _is_async(dependant.call)
+    }
+    assert not offenders, sorted(offenders)